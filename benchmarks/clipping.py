@@ -0,0 +1,33 @@
+# throughput of the batch clippers on random segments around an 800x600 canvas
+#   python benchmarks/clipping.py [count ...]
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from point import Point
+from cutting import cohen_batch, liang_batch
+
+def segments(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.uniform(-200, 1000, n), rng.uniform(-200, 800, n), rng.uniform(-200, 1000, n), rng.uniform(-200, 800, n)
+
+def main():
+    counts = [int(c) for c in sys.argv[1:]] or [100_000, 1_000_000]
+    pmin, pmax = Point(200, 150), Point(600, 450)
+    for n in counts:
+        segs = segments(n)
+        for name, clip in (("cohen", cohen_batch), ("liang", liang_batch)):
+            # best of 3 runs
+            elapsed = float("inf")
+            for _ in range(3):
+                start = time.perf_counter()
+                *_, accept = clip(*segs, pmin, pmax)
+                elapsed = min(elapsed, time.perf_counter() - start)
+            print(f"{name:6} {n:>9} segments {elapsed * 1000:9.1f} ms {n / elapsed / 1e6:7.2f} M segments/s ({accept.sum()} accepted)")
+
+if __name__ == "__main__":
+    main()
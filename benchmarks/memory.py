@@ -0,0 +1,37 @@
+# bytes per point for 1M points: plain class (the old Point), __slots__ Point and PointSet
+#   python benchmarks/memory.py [count]
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from point import Point, PointSet
+
+class DictPoint:
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+
+def measure(build):
+    tracemalloc.start()
+    data = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del data
+    return size
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    cases = [
+        ("list[DictPoint] (before)", lambda: [DictPoint(float(i), float(i)) for i in range(n)]),
+        ("list[Point] (__slots__)", lambda: [Point(float(i), float(i)) for i in range(n)]),
+        ("PointSet", lambda: PointSet(map(float, range(n)), map(float, range(n)))),
+    ]
+    print(f"{n} points")
+    for name, build in cases:
+        size = measure(build)
+        print(f"{name:28} {size / 2**20:8.1f} MiB {size / n:6.1f} bytes/point")
+
+if __name__ == "__main__":
+    main()
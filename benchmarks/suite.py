@@ -0,0 +1,311 @@
+"""benchmark suite for the hot paths: rasterization, clipping, transformations and selection
+
+  python benchmarks/suite.py run [--sizes 100,1000,10000] [--cases raster,clip] [--output results.json]
+  python benchmarks/suite.py compare old.json new.json [--threshold 0.1]
+
+every case builds its input from a seeded generator, so two runs measure the same work
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from point import Point, PointSet
+from transformations import Transformations
+from rasterization.line import Line
+from rasterization.circle import Circle
+from rasterization.cache import patterns
+from rasterization.fill import FilledCircle, Polygon
+from cutting import Cutting, cohen_batch, liang_batch
+from scene import Scene
+from renderer import Renderer
+from parallel import TileRenderer
+
+WIDTH, HEIGHT = 800, 600
+
+# Scene generators ------------------------------------------------------------------------------------------------------------
+def random_points(rng, n):
+    return [Point(rng.uniform(0, WIDTH), rng.uniform(0, HEIGHT)) for _ in range(n)]
+
+# lengths follow a log-uniform distribution between 2 and 800 pixels
+def random_lines(rng, n):
+    lines = []
+    for _ in range(n):
+        x, y = rng.uniform(0, WIDTH), rng.uniform(0, HEIGHT)
+        length = 2 ** rng.uniform(1, 9.6)
+        angle = rng.uniform(0, 2 * np.pi)
+        lines.append(Line(Point(x, y), Point(x + length * np.cos(angle), y + length * np.sin(angle)), "black"))
+    return lines
+
+# radii follow a log-uniform distribution between 2 and 300 pixels
+def random_circles(rng, n):
+    circles = []
+    for _ in range(n):
+        x, y = rng.uniform(0, WIDTH), rng.uniform(0, HEIGHT)
+        r = 2 ** rng.uniform(1, 8.2)
+        circles.append(Circle(Point(x, y), Point(x + r, y), "black"))
+    return circles
+
+# Cases -----------------------------------------------------------------------------------------------------------------------
+# each case gets (rng, size) and returns a function to time; setup is not timed
+# the shared pattern LRU is emptied before every run, or the repeats would time its lookups
+def case_dda(rng, n):
+    lines = random_lines(rng, n)
+    def run():
+        patterns.clear()
+        return [l.dda_array() for l in lines]
+    return run
+
+def case_bresenham(rng, n):
+    lines = random_lines(rng, n)
+    def run():
+        patterns.clear()
+        return [l.bresenham_array() for l in lines]
+    return run
+
+def case_circle(rng, n):
+    circles = random_circles(rng, n)
+    def run():
+        patterns.clear() # measure rasterization, not cache hits
+        return [c.bresenham_array() for c in circles]
+    return run
+
+def case_dda_points(rng, n):
+    lines = random_lines(rng, n)
+    def run():
+        patterns.clear()
+        for l in lines:
+            l.invalidate()
+            l.dda()
+    return run
+
+# run-length output of n / 2 lines and n / 2 circles, rasterized again every time
+def case_runs(rng, n):
+    objects = random_lines(rng, n // 2) + random_circles(rng, n // 2)
+    def run():
+        patterns.clear()
+        for o in objects:
+            o.invalidate()
+            o.runs()
+    return run
+
+# spans of filled circles, the span pattern of every radius computed again
+def case_disc(rng, n):
+    discs = [FilledCircle(c.p, c.r_point, c.color) for c in random_circles(rng, n)]
+    def run():
+        patterns.clear()
+        return [d.spans() for d in discs]
+    return run
+
+# scanline fill of random 3 to 12 vertex polygons about 100 pixels wide
+def case_polygon(rng, n):
+    polygons = []
+    for _ in range(n):
+        x, y = rng.uniform(0, WIDTH), rng.uniform(0, HEIGHT)
+        polygons.append(Polygon([Point(x + rng.uniform(-50, 50), y + rng.uniform(-50, 50)) for _ in range(rng.randint(3, 12))], "black"))
+    def run():
+        for p in polygons:
+            p.invalidate()
+            p.spans()
+    return run
+
+# scanline fill of one polygon of n vertices about n / 2 pixels tall, down a random left side and up a
+# random right one: as many edge buckets and scanlines as vertices, so a per scanline cost that grows
+# with the edge table shows up (the polygons above are only about 100 pixels tall)
+def case_polygon_tall(rng, n):
+    left = [Point(rng.uniform(0, WIDTH / 2), y) for y in range(n // 2)]
+    right = [Point(rng.uniform(WIDTH / 2, WIDTH), y) for y in range(n - n // 2)]
+    polygon = Polygon(left + right[::-1], "black")
+    def run():
+        polygon.invalidate()
+        polygon.spans()
+    return run
+
+def window():
+    return Point(200, 150), Point(600, 450)
+
+def case_run_cohen(rng, n):
+    lines = random_lines(rng, n)
+    cut = Cutting(lines, *window())
+    return lambda: [cut.run_cohen(l.p1, l.p2, l.color) for l in lines]
+
+def case_run_liang(rng, n):
+    lines = random_lines(rng, n)
+    cut = Cutting(lines, *window())
+    return lambda: [cut.run_liang(l.p1, l.p2, l.color) for l in lines]
+
+def segment_arrays(rng, n):
+    lines = random_lines(rng, n)
+    return [np.array([getattr(getattr(l, p), c) for l in lines]) for p, c in (("p1", "x"), ("p1", "y"), ("p2", "x"), ("p2", "y"))]
+
+def case_cohen_batch(rng, n):
+    segs = segment_arrays(rng, n)
+    return lambda: cohen_batch(*segs, *window())
+
+def case_liang_batch(rng, n):
+    segs = segment_arrays(rng, n)
+    return lambda: liang_batch(*segs, *window())
+
+def case_rotate_list(rng, n):
+    points = random_points(rng, n)
+    trans = Transformations(points)
+    return lambda: trans.rotate(points, 30, (400, 300))
+
+def case_rotate_pointset(rng, n):
+    points = PointSet.from_points(random_points(rng, n))
+    trans = Transformations(points)
+    return lambda: trans.rotate(points, 30, (400, 300))
+
+def case_translate_pointset(rng, n):
+    points = PointSet.from_points(random_points(rng, n))
+    trans = Transformations(points)
+    return lambda: trans.translate(points, 10, 5)
+
+# a scene with n free points and n / 10 lines and circles, selecting a 100x100 window
+def case_select(rng, n):
+    scene = Scene()
+    for p in random_points(rng, n):
+        scene.store_point(p)
+    for o in random_lines(rng, n // 20) + random_circles(rng, n // 20):
+        scene.add_object(o)
+    def run():
+        scene.select(350, 250, 450, 350)
+        scene.merge_selection()
+    return run
+
+# first pixel inside a 100x100 window for n lines, rasterized lazily in small chunks
+def case_raster_hit(rng, n):
+    lines = random_lines(rng, n)
+    cut = Cutting([], Point(350, 250), Point(450, 350))
+    def run():
+        for l in lines:
+            any(cut.inside_arrays(xs, ys).any() for xs, ys in l.iter_pixel_arrays(64))
+    return run
+
+# full scene render, n / 2 lines and n / 2 circles
+def render_scene(rng, n):
+    scene = Scene()
+    for o in random_lines(rng, n // 2) + random_circles(rng, n // 2):
+        scene.add_object(o)
+    return scene
+
+def case_render_serial(rng, n):
+    scene = render_scene(rng, n)
+    renderer = Renderer(WIDTH, HEIGHT)
+    return lambda: renderer.render(scene)
+
+def case_render_tiles(rng, n):
+    scene = render_scene(rng, n)
+    renderer = TileRenderer(WIDTH, HEIGHT, threshold=0)
+    return lambda: renderer.render(scene)
+
+CASES = {
+    "raster.dda": case_dda,
+    "raster.bresenham": case_bresenham,
+    "raster.circle": case_circle,
+    "raster.dda_points": case_dda_points,
+    "raster.runs": case_runs,
+    "raster.disc": case_disc,
+    "raster.polygon": case_polygon,
+    "raster.polygon_tall": case_polygon_tall,
+    "clip.run_cohen": case_run_cohen,
+    "clip.run_liang": case_run_liang,
+    "clip.cohen_batch": case_cohen_batch,
+    "clip.liang_batch": case_liang_batch,
+    "transform.rotate_list": case_rotate_list,
+    "transform.rotate_pointset": case_rotate_pointset,
+    "transform.translate_pointset": case_translate_pointset,
+    "select.window": case_select,
+    "select.raster_hit": case_raster_hit,
+    "render.serial": case_render_serial,
+    "render.tiles": case_render_tiles,
+}
+
+# Run and compare -------------------------------------------------------------------------------------------------------------
+def measure(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def run(args):
+    names = [n for n in CASES if not args.cases or any(n.startswith(c) for c in args.cases.split(","))]
+    sizes = [int(float(s)) for s in args.sizes.split(",")]
+    results = []
+    for name in names:
+        for size in sizes:
+            # same input for the same case and size, whatever else runs
+            rng = random.Random(f"{args.seed}:{name}:{size}")
+            fn = CASES[name](rng, size)
+            seconds = measure(fn, args.repeat)
+            results.append({"case": name, "size": size, "seconds": seconds, "us_per_item": seconds / size * 1e6})
+            print(f"{name:30} {size:>9} {seconds * 1000:11.2f} ms {seconds / size * 1e6:9.3f} us/item", flush=True)
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "seed": args.seed,
+            "repeat": args.repeat,
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+# flag every case/size that got slower than the threshold, exit code 1 if any did
+def compare(args):
+    with open(args.old) as f:
+        old = {(r["case"], r["size"]): r["seconds"] for r in json.load(f)["results"]}
+    with open(args.new) as f:
+        new = {(r["case"], r["size"]): r["seconds"] for r in json.load(f)["results"]}
+
+    regressions = 0
+    for key in sorted(old.keys() & new.keys()):
+        ratio = new[key] / old[key]
+        flag = ""
+        if ratio > 1 + args.threshold:
+            flag = "REGRESSION"
+            regressions += 1
+        elif ratio < 1 - args.threshold:
+            flag = "faster"
+        print(f"{key[0]:30} {key[1]:>9} {old[key] * 1000:11.2f} ms -> {new[key] * 1000:11.2f} ms {ratio:6.2f}x {flag}")
+    print(f"{regressions} regression(s)")
+    return 1 if regressions else 0
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("run")
+    p.add_argument("--sizes", default="100,1000,10000", help="comma separated, e.g. 1e2,1e4,1e6")
+    p.add_argument("--cases", default="", help="comma separated name prefixes, e.g. raster,clip.liang")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--repeat", type=int, default=3)
+    p.add_argument("--output", help="write the results as JSON")
+
+    p = sub.add_parser("compare")
+    p.add_argument("old")
+    p.add_argument("new")
+    p.add_argument("--threshold", type=float, default=0.1, help="relative slowdown flagged as regression")
+
+    args = parser.parse_args()
+    if args.command == "run":
+        run(args)
+    else:
+        sys.exit(compare(args))
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,11 @@
+import math
+
+import numpy as np
+
 from point import Point
 from rasterization.line import Line
+from rasterization.circle import Circle, Arc
+from rasterization.fill import FilledCircle, Polygon
 
 # cohen region codes
 INSIDE = 0  # 0000
@@ -7,6 +13,101 @@ LEFT = 1    # 0001
 RIGHT = 2   # 0010
 BOTTOM = 4  # 0100
 TOP = 8     # 1000
+
+# Batch clipping -------------------------------------------------------------------------------------------
+# segments are given as four float arrays (x1, y1, x2, y2) and the window as two Points.
+# both return new clipped arrays plus a boolean accept mask, the inputs are not modified
+def get_codes(xs, ys, pmin, pmax):
+    codes = np.zeros(len(xs), dtype=np.int8)
+    codes[xs < pmin.x] |= LEFT
+    codes[xs > pmax.x] |= RIGHT
+    codes[ys < pmin.y] |= BOTTOM
+    codes[ys > pmax.y] |= TOP
+    return codes
+
+def cohen_batch(x1, y1, x2, y2, pmin, pmax):
+    x1, y1, x2, y2 = (np.array(a, dtype=np.float64) for a in (x1, y1, x2, y2))
+    accept = np.zeros(len(x1), dtype=bool)
+    active = np.arange(len(x1))
+
+    # every pass moves one outside end of each active segment onto a window edge,
+    # so no segment needs more than four passes
+    while len(active):
+        cod1 = get_codes(x1[active], y1[active], pmin, pmax)
+        cod2 = get_codes(x2[active], y2[active], pmin, pmax)
+
+        inside = (cod1 | cod2) == INSIDE
+        accept[active[inside]] = True
+        keep = ~inside & ((cod1 & cod2) == INSIDE)
+        active, cod1, cod2 = active[keep], cod1[keep], cod2[keep]
+        if not len(active):
+            break
+
+        first = cod1 != INSIDE
+        cod = np.where(first, cod1, cod2)
+        ax, ay, bx, by = x1[active], y1[active], x2[active], y2[active]
+        xint = np.empty(len(active))
+        yint = np.empty(len(active))
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            top = (cod & TOP) != 0
+            xint[top] = (ax + (bx - ax) * (pmax.y - ay) / (by - ay))[top]
+            yint[top] = pmax.y
+            bottom = (cod & BOTTOM) != 0
+            xint[bottom] = (ax + (bx - ax) * (pmin.y - ay) / (by - ay))[bottom]
+            yint[bottom] = pmin.y
+            # same precedence as run_cohen: left, right, bottom, top
+            right = (cod & RIGHT) != 0
+            xint[right] = pmax.x
+            yint[right] = (ay + (by - ay) * (pmax.x - ax) / (bx - ax))[right]
+            left = (cod & LEFT) != 0
+            xint[left] = pmin.x
+            yint[left] = (ay + (by - ay) * (pmin.x - ax) / (bx - ax))[left]
+
+        x1[active[first]], y1[active[first]] = xint[first], yint[first]
+        x2[active[~first]], y2[active[~first]] = xint[~first], yint[~first]
+
+    return x1, y1, x2, y2, accept
+
+def liang_batch(x1, y1, x2, y2, pmin, pmax):
+    x1, y1, x2, y2 = (np.asarray(a, dtype=np.float64) for a in (x1, y1, x2, y2))
+    dx = x2 - x1
+    dy = y2 - y1
+    u1 = np.zeros(len(x1))
+    u2 = np.ones(len(x1))
+    accept = np.ones(len(x1), dtype=bool)
+
+    # left, right, bottom, top
+    for p, q in ((-dx, x1 - pmin.x), (dx, pmax.x - x1), (-dy, y1 - pmin.y), (dy, pmax.y - y1)):
+        with np.errstate(divide="ignore", invalid="ignore"):
+            r = q / p
+        accept &= ~((p == 0) & (q < 0)) # parallel and outside
+        u1 = np.where(p < 0, np.maximum(u1, r), u1) # out-in
+        u2 = np.where(p > 0, np.minimum(u2, r), u2) # in-out
+    accept &= u1 <= u2
+
+    return x1 + dx * u1, y1 + dy * u1, x1 + dx * u2, y1 + dy * u2, accept
+
+# circular spans are (start, length) in radians
+def intersect_spans(a, b):
+    # split spans crossing 2pi so every piece is a plain interval
+    def pieces(spans):
+        for start, length in spans:
+            start %= 2 * math.pi
+            if start + length > 2 * math.pi:
+                yield start, 2 * math.pi
+                yield 0, start + length - 2 * math.pi
+            else:
+                yield start, start + length
+
+    result = []
+    for s1, e1 in pieces(a):
+        for s2, e2 in pieces(b):
+            start, end = max(s1, s2), min(e1, e2)
+            if start < end:
+                result.append((start, end - start))
+    return result
+
 class Cutting:
     def __init__(self, objects, pmin, pmax):
         if isinstance(pmin, Point) and isinstance(pmax, Point):
@@ -16,30 +117,195 @@ class Cutting:
         else:
             raise TypeError("pmin and pmax must be Point type")
 
-    # gets an array of objects and return an array of cutted objects
+    # gets an array of objects and return an array of cutted objects,
+    # lines outside the window are dropped
     def cohen(self):
-        new_objects = []
-        for o in self.objects:
-            if isinstance(o, Line):
-                new_line = self.run_cohen(o.p1, o.p2, o.color)
-                new_objects.append(new_line)
-            else:
-                # nothing happens
-                new_objects.append(o)
-        return new_objects
+        return self.clip_objects(cohen_batch)
 
-    # gets an array of objects and return an array of cutted objects
+    # gets an array of objects and return an array of cutted objects,
+    # lines outside the window are dropped
     def liang(self):
+        return self.clip_objects(liang_batch)
+
+    # all lines are clipped in one batch call, the input lines and points are left untouched
+    def clip_objects(self, clip):
+        lines = [o for o in self.objects if isinstance(o, Line)]
+        x1, y1, x2, y2, accept = clip([l.p1.x for l in lines], [l.p1.y for l in lines],
+                                      [l.p2.x for l in lines], [l.p2.y for l in lines], self.pmin, self.pmax)
+        clipped = {}
+        for i, l in enumerate(lines):
+            if accept[i]:
+                clipped[l] = Line(Point(float(x1[i]), float(y1[i])), Point(float(x2[i]), float(y2[i])), l.color, l.algorithm)
+
         new_objects = []
         for o in self.objects:
             if isinstance(o, Line):
-                new_line = self.run_liang(o.p1, o.p2, o.color)
-                new_objects.append(new_line)
+                if o in clipped:
+                    new_objects.append(clipped[o])
+            elif isinstance(o, (FilledCircle, Polygon)):
+                shape = self.clip_filled(o)
+                if shape is not None:
+                    new_objects.append(shape)
+            elif isinstance(o, Circle):
+                circle = self.clip_circle(o)
+                if circle is not None:
+                    new_objects.append(circle)
             else:
                 # nothing happens
                 new_objects.append(o)
         return new_objects
 
+    def contains(self, x, y):
+        return self.pmin.x <= x <= self.pmax.x and self.pmin.y <= y <= self.pmax.y
+
+    # Circles ------------------------------------------------------------------------------------------------
+    # returns the circle itself when it is completely inside the window, None when no part of it is,
+    # otherwise an Arc with only the spans of the outline that are inside
+    def clip_circle(self, o):
+        cx, cy, r = o.p.x, o.p.y, o.r
+
+        # angles where the outline crosses the window edges
+        angles = set()
+        for x in (self.pmin.x, self.pmax.x):
+            h = r * r - (x - cx) ** 2
+            if h >= 0:
+                for y in (cy - math.sqrt(h), cy + math.sqrt(h)):
+                    if self.pmin.y <= y <= self.pmax.y:
+                        angles.add(math.atan2(y - cy, x - cx) % (2 * math.pi))
+        for y in (self.pmin.y, self.pmax.y):
+            h = r * r - (y - cy) ** 2
+            if h >= 0:
+                for x in (cx - math.sqrt(h), cx + math.sqrt(h)):
+                    if self.pmin.x <= x <= self.pmax.x:
+                        angles.add(math.atan2(y - cy, x - cx) % (2 * math.pi))
+        angles = sorted(angles)
+
+        if len(angles) < 2:
+            # no crossing (or only touching an edge): test the side away from the touching point
+            a = angles[0] + math.pi if angles else 0
+            return o if self.contains(cx + r * math.cos(a), cy + r * math.sin(a)) else None
+
+        # keep the spans between consecutive crossings whose middle is inside
+        spans = []
+        for i, a in enumerate(angles):
+            length = (angles[(i + 1) % len(angles)] - a) % (2 * math.pi)
+            mid = a + length / 2
+            if self.contains(cx + r * math.cos(mid), cy + r * math.sin(mid)):
+                spans.append(((a - o.reference_angle()) % (2 * math.pi), length))
+
+        if isinstance(o, Arc):
+            spans = intersect_spans(o.spans, spans)
+        if not spans:
+            return None
+        return Arc(o.p, o.r_point, o.color, spans)
+
+    # Filled shapes ----------------------------------------------------------------------------------------
+    # the shape itself when its bounds are inside the window, None when nothing is left, otherwise
+    # a Polygon (a filled circle is first turned into a polygon close to it)
+    def clip_filled(self, o):
+        x1, y1, x2, y2 = o.bounds()
+        if self.contains(x1, y1) and self.contains(x2, y2):
+            return o
+        polygon = o.to_polygon() if isinstance(o, FilledCircle) else o
+        points = self.clip_polygon(polygon.control_points())
+        return Polygon(points, o.color) if len(points) >= 3 else None
+
+    # Sutherland-Hodgman: the vertices are clipped against one window edge after the other
+    def clip_polygon(self, points):
+        edges = ((lambda p: p.x >= self.pmin.x, lambda a, b: self.cross_x(a, b, self.pmin.x)),
+                 (lambda p: p.x <= self.pmax.x, lambda a, b: self.cross_x(a, b, self.pmax.x)),
+                 (lambda p: p.y >= self.pmin.y, lambda a, b: self.cross_y(a, b, self.pmin.y)),
+                 (lambda p: p.y <= self.pmax.y, lambda a, b: self.cross_y(a, b, self.pmax.y)))
+        for inside, cross in edges:
+            if not points:
+                break
+            result = []
+            for i, p in enumerate(points):
+                prev = points[i - 1]
+                if inside(p):
+                    if not inside(prev):
+                        result.append(cross(prev, p))
+                    result.append(p)
+                elif inside(prev):
+                    result.append(cross(prev, p))
+            points = result
+        return points
+
+    # point of the segment ab on the vertical x = c / horizontal y = c
+    def cross_x(self, a, b, c):
+        return Point(c, a.y + (b.y - a.y) * (c - a.x) / (b.x - a.x))
+
+    def cross_y(self, a, b, c):
+        return Point(a.x + (b.x - a.x) * (c - a.y) / (b.y - a.y), c)
+
+    # Selection --------------------------------------------------------------------------------------------
+    # exact tests of a primitive against the window, without rasterizing it
+    def touches(self, o):
+        if isinstance(o, Line):
+            return self.line_touches(o.p1, o.p2)
+        if isinstance(o, Polygon):
+            return self.polygon_touches(o.control_points())
+        if isinstance(o, FilledCircle):
+            return self.disc_touches(o.p, o.r)
+        if isinstance(o, Arc):
+            # the whole outline first, then the pixels of the spans
+            return self.circle_touches(o.p, o.r) and self.raster_touches(o)
+        if isinstance(o, Circle):
+            return self.circle_touches(o.p, o.r)
+        return False
+
+    # is one of the pixels of o inside the window: the raster is generated lazily
+    # and stops at the first chunk with a pixel inside
+    def raster_touches(self, o):
+        return any(self.inside_arrays(xs, ys).any() for xs, ys in o.iter_pixel_arrays())
+
+    # an edge touches the window, or the window is inside the polygon (test one of its corners)
+    def polygon_touches(self, points):
+        if any(self.line_touches(points[i - 1], p) for i, p in enumerate(points)):
+            return True
+        x, y = self.pmin.x, self.pmin.y
+        inside = False
+        for i, p in enumerate(points):
+            q = points[i - 1]
+            if (p.y > y) != (q.y > y) and x < q.x + (p.x - q.x) * (y - q.y) / (p.y - q.y):
+                inside = not inside
+        return inside
+
+    # the window touches a disc if its nearest point is inside it
+    def disc_touches(self, c, r):
+        nx = min(max(c.x, self.pmin.x), self.pmax.x)
+        ny = min(max(c.y, self.pmin.y), self.pmax.y)
+        return math.hypot(c.x - nx, c.y - ny) <= r
+
+    def line_touches(self, p1, p2):
+        cod1 = self.get_code(p1)
+        cod2 = self.get_code(p2)
+
+        if cod1 == INSIDE or cod2 == INSIDE: # an end inside
+            return True
+        if cod1 & cod2 != INSIDE: # both ends on the same outer side
+            return False
+
+        # otherwise the segment crosses the window only if the window corners
+        # are not all on the same side of its line
+        sides = [(p2.x - p1.x) * (y - p1.y) - (p2.y - p1.y) * (x - p1.x)
+                 for x, y in ((self.pmin.x, self.pmin.y), (self.pmax.x, self.pmin.y),
+                              (self.pmax.x, self.pmax.y), (self.pmin.x, self.pmax.y))]
+        return min(sides) <= 0 <= max(sides)
+
+    # the outline touches the window if the nearest point of the window is inside the
+    # circle and the farthest corner is not
+    def circle_touches(self, c, r):
+        nx = min(max(c.x, self.pmin.x), self.pmax.x)
+        ny = min(max(c.y, self.pmin.y), self.pmax.y)
+        fx = max(abs(c.x - self.pmin.x), abs(c.x - self.pmax.x))
+        fy = max(abs(c.y - self.pmin.y), abs(c.y - self.pmax.y))
+        return math.hypot(c.x - nx, c.y - ny) <= r <= math.hypot(fx, fy)
+
+    # boolean numpy mask of the coordinates that are inside the window
+    def inside_arrays(self, xs, ys):
+        return (xs >= self.pmin.x) & (xs <= self.pmax.x) & (ys >= self.pmin.y) & (ys <= self.pmax.y)
+
     # Cohen --------------------------------------------------------------------------------------------------
     def get_code(self, p):
         code = INSIDE
@@ -57,6 +323,7 @@ class Cutting:
         return (value >> position) & 1
 
     def run_cohen(self, p1, p2, color):
+        p1, p2 = Point(p1.x, p1.y), Point(p2.x, p2.y)
         done = False
         accept = False
         line = []
@@ -115,6 +382,7 @@ class Cutting:
         return result
 
     def run_liang(self, p1, p2, color):
+        p1, p2 = Point(p1.x, p1.y), Point(p2.x, p2.y)
         dx = p2.x - p1.x
         dy = p2.y - p1.y
         self.u1 = 0
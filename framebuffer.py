@@ -0,0 +1,120 @@
+import struct
+import zlib
+
+import numpy as np
+
+# compact RGB pixel buffer: 3 bytes per pixel inside a single bytearray
+
+# tk 8.6 values for the palette colors
+COLORS = {
+    "white": (255, 255, 255),
+    "black": (0, 0, 0),
+    "red": (255, 0, 0),
+    "green": (0, 128, 0),
+    "blue": (0, 0, 255),
+    "yellow": (255, 255, 0),
+    "purple": (128, 0, 128),
+    "orange": (255, 165, 0),
+    "pink": (255, 192, 203),
+    "hotpink": (255, 105, 180),
+}
+
+def rgb(color):
+    if isinstance(color, tuple):
+        return color
+    if color.startswith("#") and len(color) == 7:
+        return tuple(int(color[i:i + 2], 16) for i in (1, 3, 5))
+    if color in COLORS:
+        return COLORS[color]
+    raise ValueError(f"Unknown color: {color}")
+
+# write spans (rasterization.fill.Spans already inside the array) into a (height, width, 3) array,
+# one row slice assignment per span
+def fill_rows(pixels, spans, color):
+    for y, x0, x1 in spans:
+        pixels[y, x0:x1 + 1] = color
+
+# same for transposed spans (x, y_start, y_end), one column slice per span
+def fill_columns(pixels, spans, color):
+    for x, y0, y1 in spans:
+        pixels[y0:y1 + 1, x] = color
+
+class FrameBuffer:
+    def __init__(self, width, height, bg="white"):
+        self.width = width
+        self.height = height
+        self.bg_color = rgb(bg)
+        self.bg = bytes(self.bg_color)
+        self.data = bytearray(self.bg * (width * height))
+
+    def fill(self, color=None):
+        c = self.bg if color is None else bytes(rgb(color))
+        self.data[:] = c * (self.width * self.height)
+
+    def plot(self, x, y, color):
+        x, y = round(x), round(y)
+        if 0 <= x < self.width and 0 <= y < self.height:
+            i = (y * self.width + x) * 3
+            self.data[i:i + 3] = bytes(rgb(color))
+
+    # plot a list of Point with one color, pixels outside the buffer are skipped
+    def plot_points(self, points, color):
+        c = bytes(rgb(color))
+        w, h, data = self.width, self.height, self.data
+        for p in points:
+            x, y = round(p.x), round(p.y)
+            if 0 <= x < w and 0 <= y < h:
+                i = (y * w + x) * 3
+                data[i:i + 3] = c
+
+    # plot int coordinate arrays with one color in a single numpy assignment
+    def plot_arrays(self, xs, ys, color):
+        keep = (xs >= 0) & (xs < self.width) & (ys >= 0) & (ys < self.height)
+        self.pixels()[ys[keep], xs[keep]] = rgb(color)
+
+    # plot horizontal spans with one color, one row slice write per span
+    def fill_spans(self, spans, color):
+        fill_rows(self.pixels(), spans.clip(0, 0, self.width, self.height), rgb(color))
+
+    # plot rasterization.runs.Runs with one color: a slice write per row/column run,
+    # the single pixels in one assignment
+    def fill_runs(self, runs, color):
+        runs = runs.clip(0, 0, self.width, self.height)
+        c = rgb(color)
+        pixels = self.pixels()
+        fill_rows(pixels, runs.rows, c)
+        fill_columns(pixels, runs.columns, c)
+        pixels[runs.ys, runs.xs] = c
+
+    # (height, width, 3) numpy view of the buffer
+    def pixels(self):
+        return np.frombuffer(self.data, dtype=np.uint8).reshape(self.height, self.width, 3)
+
+    def get(self, x, y):
+        i = (y * self.width + x) * 3
+        return tuple(self.data[i:i + 3])
+
+    # binary PPM (P6), readable by tk.PhotoImage and most image tools.
+    # box (x1, y1, x2, y2), x2/y2 excluded, gives only that part of the buffer
+    def to_ppm(self, box=None):
+        if box is None:
+            return f"P6 {self.width} {self.height} 255\n".encode() + bytes(self.data)
+        x1, y1, x2, y2 = box
+        return f"P6 {x2 - x1} {y2 - y1} 255\n".encode() + self.pixels()[y1:y2, x1:x2].tobytes()
+
+    # 8-bit RGB PNG, no filtering
+    def to_png(self):
+        def chunk(kind, data):
+            body = kind + data
+            return struct.pack(">I", len(data)) + body + struct.pack(">I", zlib.crc32(body))
+
+        stride = self.width * 3
+        raw = b"".join(b"\x00" + self.data[y * stride:(y + 1) * stride] for y in range(self.height))
+        header = struct.pack(">IIBBBBB", self.width, self.height, 8, 2, 0, 0, 0)
+        return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) + chunk(b"IDAT", zlib.compress(raw)) + chunk(b"IEND", b"")
+
+    # write a .png or .ppm file depending on the extension
+    def save(self, path):
+        data = self.to_png() if path.lower().endswith(".png") else self.to_ppm()
+        with open(path, "wb") as f:
+            f.write(data)
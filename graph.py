@@ -0,0 +1,146 @@
+import itertools
+
+from transformations import Affine
+
+# scene graph: groups carry a local affine transform and hold leaves (one line/circle each) or
+# other groups. a node's world transform is its local transform followed by its parent's, cached
+# and recomputed only when the node or one of its ancestors changed, so moving a group is one node
+# update however many primitives it holds. world bounds are the union of the bounds of the world
+# primitives, kept per subtree under the world key and marked dirty up the tree when something
+# under them changes; they are only rebuilt when asked for
+
+ids = itertools.count(1)
+
+def union(a, b):
+    if a is None:
+        return b
+    return min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3])
+
+def overlaps(box, x1, y1, x2, y2):
+    return box is not None and box[0] <= x2 and x1 <= box[2] and box[1] <= y2 and y1 <= box[3]
+
+class Node:
+    def __init__(self, local=None):
+        self.id = next(ids) # stable for the life of the node
+        self.parent = None
+        self.local = local or Affine.identity()
+        self.version = 0 # bumped when the local transform changes
+        self.world_cache = None # (world key, Affine)
+        self.bounds_cache = None # (world key, world bounds of the subtree), None when dirty
+
+    # Transforms ------------------------------------------------------------------------------------------------------------------
+    def set_local(self, m):
+        self.local = m
+        self.version += 1
+        if self.parent is not None:
+            self.parent.invalidate_bounds()
+
+    # apply m after the node's current placement, in its parent's coordinates
+    def transform(self, m):
+        self.set_local(self.local.then(m))
+
+    # changes whenever this node or an ancestor gets a new local transform or parent
+    def world_key(self):
+        key = (self.id, self.version)
+        return key if self.parent is None else (self.parent.world_key(), key)
+
+    def world(self):
+        key = self.world_key()
+        if self.world_cache is None or self.world_cache[0] != key:
+            m = self.local if self.parent is None else self.local.then(self.parent.world())
+            self.world_cache = (key, m)
+        return self.world_cache[1]
+
+    # Bounds ----------------------------------------------------------------------------------------------------------------------
+    # an ancestor of a dirty node is dirty too, so the walk stops at the first one already marked
+    def invalidate_bounds(self):
+        node = self
+        while node is not None and node.bounds_cache is not None:
+            node.bounds_cache = None
+            node = node.parent
+
+    # (x1, y1, x2, y2) in world coordinates, None for an empty group
+    def world_bounds(self):
+        key = self.world_key()
+        if self.bounds_cache is None or self.bounds_cache[0] != key:
+            self.bounds_cache = (key, self.compute_bounds())
+        return self.bounds_cache[1]
+
+class Leaf(Node):
+    def __init__(self, primitive, local=None):
+        super().__init__(local)
+        self.primitive = primitive # line or circle, in the leaf's coordinates
+        self.object_cache = None # (world key, primitive in world coordinates)
+
+    def __repr__(self):
+        return f"Leaf#{self.id}({self.primitive})"
+
+    # the bounds of the primitive actually drawn: a circle under a non-uniform scale stays a circle
+    # (of the scaled radius), so mapping the corners of the local bounds would be wrong
+    def compute_bounds(self):
+        return self.world_object().bounds()
+
+    def leaves(self):
+        yield self
+
+    # the primitive placed in the world, rebuilt only after the world transform changed
+    def world_object(self):
+        m = self.world()
+        if m.is_identity():
+            return self.primitive
+        key = self.world_key()
+        if self.object_cache is None or self.object_cache[0] != key:
+            points = m.apply(self.primitive.control_points())
+            self.object_cache = (key, self.primitive.copy_with(points, m.determinant() < 0))
+        return self.object_cache[1]
+
+class Group(Node):
+    def __init__(self, local=None):
+        super().__init__(local)
+        self.children = {} # node -> None, an ordered set (drawing order)
+
+    def __repr__(self):
+        return f"Group#{self.id}({len(self.children)} children)"
+
+    def __len__(self):
+        return len(self.children)
+
+    def add(self, node):
+        if node.parent is not None:
+            node.parent.remove(node)
+        node.parent = self
+        self.children[node] = None
+        self.invalidate_bounds()
+        return node
+
+    def remove(self, node):
+        del self.children[node]
+        node.parent = None
+        self.invalidate_bounds()
+
+    def compute_bounds(self):
+        box = None
+        for child in self.children:
+            b = child.world_bounds()
+            if b is not None:
+                box = union(box, b)
+        return box
+
+    def leaves(self):
+        for child in self.children:
+            yield from child.leaves()
+
+    # leaves whose world bounds overlap the rectangle, subtrees outside it are skipped whole
+    def query(self, x1, y1, x2, y2):
+        if not overlaps(self.world_bounds(), x1, y1, x2, y2):
+            return
+        for child in self.children:
+            if isinstance(child, Group):
+                yield from child.query(x1, y1, x2, y2)
+            elif overlaps(child.world_bounds(), x1, y1, x2, y2):
+                yield child
+
+    # world primitives of every leaf, or only of those overlapping `rect`
+    def world_objects(self, rect=None):
+        leaves = self.leaves() if rect is None else self.query(*rect)
+        return [leaf.world_object() for leaf in leaves]
@@ -3,15 +3,23 @@ from tkinter import ttk, Toplevel
 import tkinter.messagebox as messagebox
 import math
 
-from point import Point
-from transformations import Transformations
+from transformations import Affine
 from selection import Selector
 from rasterization.line import Line
-from rasterization.circle import Circle
-from cutting import Cutting
+from rasterization.fill import Filled, Polygon
+from rasterization.runs import Runs, Spans
+from layer import CanvasLayer, FrameBufferLayer
+from parallel import TileRenderer
+from scene import Scene
+from profiler import profiler
+from scheduler import FrameScheduler
+from preview import Preview
+from viewport import Viewport
 
 class GraphicsApp:
-    def __init__(self, root):
+    # backend "framebuffer" draws everything into one PhotoImage, "canvas" uses one item per pixel.
+    # profile=True starts with the instrumentation HUD on, F2 toggles it
+    def __init__(self, root, backend="framebuffer", profile=False):
         self.root = root
         self.root.title("Paint")
 
@@ -24,15 +32,27 @@ class GraphicsApp:
         # canvas
         self.canvas = tk.Canvas(root, bg="white", width=800, height=600)
         self.canvas.pack(fill=tk.BOTH, expand=True)
+        # the tile renderer keeps a worker pool for bulk draws, shut down when the window closes
+        self.renderer = None
+        if backend == "canvas":
+            self.layer = CanvasLayer(self.canvas)
+        else:
+            self.renderer = TileRenderer(800, 600)
+            self.layer = FrameBufferLayer(self.canvas, 800, 600, self.renderer)
+        self.root.protocol("WM_DELETE_WINDOW", self.close)
 
-        self.points = []
-        self.selected_points = []
-        self.objects = [] # store lines and circles points inside the canvas
-        self.selected_objects = []
+        # points, objects and selection live in the headless scene, in world coordinates.
+        # the viewport maps them to the canvas (wheel zooms, middle button drag pans)
+        self.scene = Scene()
+        self.view = Viewport(800, 600)
 
         self.current_color = "black" # default
 
         # bind mouse events
+        # motion events are coalesced and applied at most once per frame
+        self.motion = FrameScheduler(self.canvas)
+        # live mode previews the transform while dragging and applies it on release
+        self.preview = Preview(self.canvas)
         self.canvas.bind("<Button-1>", self.handle_button_1)
         self.canvas.bind("<B1-Motion>", self.handle_b1_motion)
         self.canvas.bind("<ButtonRelease-1>", self.handle_buttonrelease_1)
@@ -41,6 +61,12 @@ class GraphicsApp:
         self.canvas.bind("<Button-3>", self.handle_button_3)
         self.canvas.bind("<B3-Motion>", self.handle_b3_motion)
         self.canvas.bind("<ButtonRelease-3>", self.handle_buttonrelease_3)
+        self.canvas.bind("<Button-2>", self.handle_button_2)
+        self.canvas.bind("<B2-Motion>", self.handle_b2_motion)
+        self.canvas.bind("<MouseWheel>", self.handle_wheel)
+        self.canvas.bind("<Button-4>", self.handle_wheel)
+        self.canvas.bind("<Button-5>", self.handle_wheel)
+        self.root.bind("<F2>", self.toggle_profiler)
 
         # initialize selector
         self.selector = None
@@ -51,45 +77,89 @@ class GraphicsApp:
         self.sy = 1 # default value
         self.selected_axis = 'X' # default value
 
+        if profile:
+            profiler.enable(self.canvas, self.scene)
+
+    # the window is closed: release the renderer's workers, then the window
+    def close(self):
+        if self.renderer is not None:
+            self.renderer.close()
+        self.root.destroy()
+
 
     # Handle events --------------------------------------------------------------------------------------------------------------
+    # presses and releases first apply the motion still waiting for its frame
     def handle_button_1(self, event):
+        self.motion.flush()
         if not self.selector_exits:
             self.add_point(event)
         else:
             self.start_drag_selector(event)
 
     def handle_b1_motion(self, event):
+        self.motion.post("b1", self.apply_b1_motion, event)
+
+    def apply_b1_motion(self, event):
         if self.selector_exits and not self.is_rotating and not self.is_resizing:
             self.drag_selector(event)
         elif self.selector_exits and self.is_rotating:
             self.rotate_rectangle(event)
         elif self.selector_exits and self.is_resizing:
             self.scale(event)
+        else:
+            return
+        if self.live.get() and self.scene.has_selection():
+            if not self.preview.active:
+                self.preview.start(self.scene, self.current_color)
+            self.preview.show(self.scene.pending.then(self.live_transform()).then(self.view.affine()))
 
     def handle_buttonrelease_1(self, event):
+        self.motion.flush()
+        m = self.live_transform() if self.preview.active else None
         if self.selector:
             self.update_center(event)
         if self.is_rotating:
             self.stop_rotation(event)
         if self.is_resizing:
             self.end_scale()
+        if m is not None:
+            self.apply_live(m)
 
     def handle_shift_b1(self, event):
+        self.motion.flush()
         self.start_rotation(event)
 
     def handle_ctrl_b1(self, event):
+        self.motion.flush()
         self.start_scale(event)
 
     def handle_button_3(self, event):
+        self.motion.flush()
         self.start_select_area(event)
 
     def handle_b3_motion(self, event):
-        self.update_select_area(event)
+        self.motion.post("b3", self.update_select_area, event)
 
     def handle_buttonrelease_3(self, event):
+        self.motion.flush()
         self.finalize_select_area(event)
 
+    def handle_button_2(self, event):
+        self.motion.flush()
+        self.start_pan(event)
+
+    def handle_b2_motion(self, event):
+        self.motion.post("b2", self.pan, event)
+
+    # <MouseWheel> on Windows/macOS, <Button-4>/<Button-5> on X11
+    def handle_wheel(self, event):
+        self.motion.flush()
+        zoom_in = event.num == 4 or getattr(event, "delta", 0) > 0
+        self.zoom(1.25 if zoom_in else 0.8, event)
+
+    def toggle_profiler(self, event=None):
+        profiler.toggle(self.canvas, self.scene)
+
 
     # Buttons ---------------------------------------------------------------------------------------------------------------------
     def add_buttons(self):
@@ -111,12 +181,28 @@ class GraphicsApp:
         btn_scale = ttk.Button(self.toolbar, text="Circle", command=self.circle_btn)
         btn_scale.pack(side=tk.LEFT, padx=5, pady=5)
 
+        btn_fill = ttk.Button(self.toolbar, text="Fill", command=self.fill_btn)
+        btn_fill.pack(side=tk.LEFT, padx=5, pady=5)
+
         btn_scale = ttk.Button(self.toolbar, text="Cut", command=self.cut_btn)
         btn_scale.pack(side=tk.LEFT, padx=5, pady=5)
 
+        btn_group = ttk.Button(self.toolbar, text="Group", command=self.group_btn)
+        btn_group.pack(side=tk.LEFT, padx=5, pady=5)
+
+        btn_ungroup = ttk.Button(self.toolbar, text="Ungroup", command=self.ungroup_btn)
+        btn_ungroup.pack(side=tk.LEFT, padx=5, pady=5)
+
+        btn_commit = ttk.Button(self.toolbar, text="Commit", command=self.commit_btn)
+        btn_commit.pack(side=tk.LEFT, padx=5, pady=5)
+
         btn_clear = ttk.Button(self.toolbar, text="Clear", command=self.clear_btn)
         btn_clear.pack(side=tk.LEFT, padx=5, pady=5)
 
+        self.live = tk.BooleanVar(value=False)
+        btn_live = ttk.Checkbutton(self.toolbar, text="Live", variable=self.live)
+        btn_live.pack(side=tk.LEFT, padx=5, pady=5)
+
         self.color_palette = tk.Frame(self.root, bg="lightgray")
         self.color_palette.pack(side=tk.TOP, fill=tk.X, pady=5)  # This places it below toolbar
 
@@ -130,12 +216,14 @@ class GraphicsApp:
         self.current_color = color
         # print(f"Selected color: {color}")
 
+    @profiler.timed()
     def clear_btn(self):
+        self.motion.cancel()
+        self.preview.stop()
         self.canvas.delete("all")
-        self.points.clear()
-        self.selected_points.clear()
-        self.objects.clear()
-        self.selected_objects.clear()
+        self.layer.clear()
+        self.scene.clear()
+        self.view.reset()
         self.selector = None
         self.selector_exits = False
         self.is_rotating = False
@@ -145,8 +233,9 @@ class GraphicsApp:
         self.selected_axis = 'X'
 
     def clear_after_operation(self):
-        self.canvas.delete("all")
-        self.remove_selected_points_from_objects()
+        if self.selector:
+            self.canvas.delete(self.selector.rect)
+        self.scene.remove_selected_points_from_objects()
         self.selector = None
         self.selector_exits = False
         self.is_rotating = False
@@ -159,65 +248,74 @@ class GraphicsApp:
 
     # Manage points and objects ---------------------------------------------------------------------------------------------------
     # store new point when user clicks
+    @profiler.timed()
     def add_point(self, event):
-        x, y = event.x, event.y
-        point = Point(x, y)
-        self.points.append(point)
+        self.scene.add_point(*self.view.to_world(event.x, event.y))
         self.update()
 
     # update canvas with points
+    @profiler.timed()
     def update(self):
         self.merge_selected_objects()
-        for p in self.points:
-            self.canvas.create_rectangle(round(p.x), round(p.y), round(p.x + 1), round(p.y + 1), fill=self.current_color, outline=self.current_color)
-        # print(f"UPDATE")
-        # print(f"Selected Points: {self.selected_points}\n------------------------------------------------------------")
-        # print(f"Main Points: {self.points}\n-------------------------------------------------------------------------")
-        # print(f"Selected Objects: {self.selected_objects}\n----------------------------------------------------------")
-        # print(f"Main Objects: {self.objects}\n-----------------------------------------------------------------------")
-
-    # merge selected points into points list
+        self.draw_points()
+        self.layer.flush()
+
+    # free points that are on screen: only the ones stored or taken since the last call are drawn or
+    # erased, all of them when the color changed or the layer forgot its points (view change, clear)
+    def draw_points(self):
+        added, removed = self.scene.point_changes()
+        if self.layer.point_color != self.current_color:
+            self.layer.draw_points(self.view.visible_points(self.scene.points), self.current_color, self.view.to_screen)
+        else:
+            self.layer.change_points(self.view.visible_points(added), removed, self.view.to_screen)
+
+    # merge selected points into points list, applying the pending transform first
     def merge_selected_objects(self):
-        self.remove_selected_points_from_objects()
-        self.points.extend(self.selected_points)
-        self.objects.extend(self.selected_objects)
-        self.selected_objects.clear()
-        self.selected_points.clear()
-
-    def remove_selected_points_from_objects(self):
-        for p in self.selected_points:
-            for o in self.objects:
-                if isinstance(o, Line):
-                    if p == o.p1 or p == o.p2:
-                        self.selected_points.remove(p)
-                elif isinstance(o, Circle):
-                    if p == o.p or p == o.r_point:
-                        self.selected_points.remove(p)
-
-    def draw_points(self, points, color="black"):
+        committed = self.commit_selection()
+        self.scene.merge_selection()
+        self.canvas.delete("selected")
+        # the moved free points are only drawn once they are back in self.scene.points
+        if committed:
+            self.draw_points()
+            self.layer.flush()
+
+    def hide_selector(self):
         if self.selector_exits:
             self.canvas.delete(self.selector.rect)
         self.selector_exits = False
-        for p in points:
-            self.canvas.create_oval(p.x, p.y, p.x + 1, p.y + 1, fill=color, outline=color)
-
-        # print(f"UPDATE")
-        # print(f"Selected Points: {self.selected_points}\n------------------------------------------------------------")
-        # print(f"Main Points: {self.points}\n-------------------------------------------------------------------------")
-        # print(f"Selected Objects: {self.selected_objects}\n----------------------------------------------------------")
-        # print(f"Main Objects: {self.objects}\n-----------------------------------------------------------------------")
 
+    # runs (rasterization.runs.Runs), the layers draw them one run at a time.
+    # only the part on screen is rasterized, no runs when none of it is
+    @profiler.timed()
+    def rasterize(self, o):
+        screen = self.view.project(o)
+        if screen is None:
+            return Runs(Spans((), (), ()))
+        return screen.runs()
+
+    # draw a single new object, keeping its items in the layer
+    @profiler.timed()
+    def draw_object(self, o, pixels):
+        self.hide_selector()
+        self.layer.draw(o, pixels, o.color)
+        self.layer.flush()
+
+    # only objects that are new since the last draw get rasterized, removed ones lose their items
+    @profiler.timed()
     def draw_objects(self):
-        self.canvas.delete("all")
-        for o in self.objects:
-            if isinstance(o, Line):
-                line = o.dda()
-                self.draw_points(line, o.color)
-            if isinstance(o, Circle):
-                circle = o.bresenham()
-                self.draw_points(circle, o.color)
-        self.selected_points.clear()
+        if self.scene.objects:
+            self.hide_selector()
+        self.layer.sync(self.visible_objects(), self.rasterize, self.view.project)
+        self.scene.selected_points.clear()
         self.update()
+
+    # objects whose bounds are on screen, in drawing order. the margin covers rounding
+    # and the DDA sample past the end of a line
+    def visible_objects(self):
+        x1, y1, x2, y2 = self.view.world_rect()
+        pad, _ = self.view.to_world_delta(2, 2)
+        seen = set(self.scene.object_index.query(x1 - pad, y1 - pad, x2 + pad, y2 + pad))
+        return [o for o in self.scene.objects if o in seen] + self.scene.grouped_objects(x1 - pad, y1 - pad, x2 + pad, y2 + pad)
     # Manage selector for selection -----------------------------------------------------------------------------------------------
     # selector starts as the pixel where the user clicked
     def start_select_area(self, event):
@@ -234,6 +332,7 @@ class GraphicsApp:
             self.selector.update_position(self.rect_start[0], self.rect_start[1], event.x, event.y)
 
     # update the selector with last position and store pixels inside
+    @profiler.timed()
     def finalize_select_area(self, event):
         if self.selector:
             x1, y1, x2, y2 = self.selector.x1, self.selector.y1, event.x, event.y
@@ -241,28 +340,10 @@ class GraphicsApp:
             y1, y2 = min(y1, y2), max(y1, y2)
 
             # divide points and objects that are inside and outside the selector
-            self.selected_objects.extend(o for o in self.objects if any(x1 <= p.x <= x2 and y1 <= p.y <= y2 for p in o.get_pixels()))
-            self.objects = [o for o in self.objects if o not in self.selected_objects]   
-
-            self.selected_points = [p for p in self.points if x1 <= p.x <= x2 and y1 <= p.y <= y2]
-            self.points = [p for p in self.points if not (x1 <= p.x <= x2 and y1 <= p.y <= y2)]
-
-            for o in self.selected_objects:
-                if isinstance(o, Line):
-                    self.selected_points.append(o.p1)
-                    self.selected_points.append(o.p2)
-                elif isinstance(o, Circle):
-                    self.selected_points.append(o.p)
-                    self.selected_points.append(o.r_point) 
+            self.scene.select(*self.view.to_world(x1, y1), *self.view.to_world(x2, y2))
 
             self.selector.update_position(x1, y1, x2, y2)
 
-            # print(f"FINALIZE SELECTOR")
-            # print(f"Selected Points: {self.selected_points}\n------------------------------------------------------------")
-            # print(f"Main Points: {self.points}\n-------------------------------------------------------------------------")
-            # print(f"Selected Objects: {self.selected_objects}\n----------------------------------------------------------")
-            # print(f"Main Objects: {self.objects}\n-----------------------------------------------------------------------")
-
     # dragging
     def start_drag_selector(self, event):
         self.drag_start_x = event.x
@@ -321,100 +402,169 @@ class GraphicsApp:
         self.selector.update_position(self.selector.x1, self.selector.y1, new_x2, new_y2)
 
     def end_scale(self):
-        # calculate sx and sy based on new rectangle size
+        self.sx, self.sy = self.scale_factors()
+
+    # calculate sx and sy based on new rectangle size
+    def scale_factors(self):
         new_width = self.selector.x2 - self.selector.x1
         new_height = self.selector.y2 - self.selector.y1
-        
-        self.sx = new_width / (self.orig_x2 - self.selector.x1)
-        self.sy = new_height / (self.orig_y2 - self.selector.y1)
-        
+
+        return new_width / (self.orig_x2 - self.selector.x1), new_height / (self.orig_y2 - self.selector.y1)
+
+    # the operation the current drag stands for, the same one its toolbar button would apply
+    def live_transform(self):
+        if self.is_rotating:
+            return Affine.rotation(self.selector.get_angle(), self.scene.selection_center())
+        if self.is_resizing:
+            return Affine.scaling(*self.scale_factors(), self.scene.selection_center())
+        x, y = self.selector.get_center()
+        return Affine.translation(*self.view.to_world_delta(x - self.initial_x, y - self.initial_y))
+
+    # on release the proxies give way to the real geometry, rasterized once
+    def apply_live(self, m):
+        self.preview.stop()
+        self.defer(m)
+        self.commit_selection()
+
+    # Viewport --------------------------------------------------------------------------------------------------------------------
+    def start_pan(self, event):
+        self.pan_x, self.pan_y = event.x, event.y
+
+    def pan(self, event):
+        dx, dy = event.x - self.pan_x, event.y - self.pan_y
+        self.pan_x, self.pan_y = event.x, event.y
+        self.change_view(lambda: self.view.pan(dx, dy))
+
+    def zoom(self, factor, event):
+        self.change_view(lambda: self.view.zoom_at(factor, event.x, event.y))
+
+    # the selection is merged back before the view moves, then everything on screen is drawn again
+    @profiler.timed()
+    def change_view(self, change):
+        if self.selector or self.scene.has_selection():
+            self.preview.stop()
+            self.clear_after_operation()
+        change()
+        self.layer.reset()
+        self.draw_objects()
 
     # Operations ------------------------------------------------------------------------------------------------------------------
     # transformation
-    def translate_btn(self):
-        trans = Transformations(self.selected_points)
+    # fold an operation into the pending transform and show the selection through cheap
+    # proxies (control-point outlines) until it is committed
+    def defer(self, m):
+        self.scene.defer(m)
+        self.draw_pending()
 
-        if not self.selected_points and not self.selected_objects:
-            messagebox.showinfo("Error", "No points selected for translation.")
-            return
+        # the next operation starts from the current selector state
+        self.initial_x, self.initial_y = self.selector.get_center()
+        self.final_x, self.final_y = self.initial_x, self.initial_y
+        self.selector.set_angle(0)
+        self.sx = 1
+        self.sy = 1
 
-        dx = self.final_x - self.initial_x
-        dy = self.final_y - self.initial_y
-
-        self.selected_points = trans.translate(self.selected_points, dx, dy)
-
-        new_selected_objects = []
-        for so in self.selected_objects:
-            if isinstance(so, Line):
-                points = [so.p1, so.p2]
-                new_so_points = trans.translate(points, dx, dy)
-                new_so = Line(new_so_points[0], new_so_points[1], so.color) 
-            elif isinstance(so, Circle):
-                points = [so.p, so.r_point]
-                new_so_points = trans.translate(points, dx, dy)
-                new_so = Circle(new_so_points[0], new_so_points[1], so.color) 
-            new_selected_objects.append(new_so)
-        self.selected_objects = new_selected_objects
+    @profiler.timed()
+    def draw_pending(self):
+        self.canvas.delete("pending")
+        m = self.scene.pending.then(self.view.affine())
+        for o in self.scene.selected_objects:
+            self.layer.erase(o)
+            points = [m.apply_point(p.x, p.y) for p in o.control_points()]
+            fill = o.color if isinstance(o, Filled) else ""
+            if isinstance(o, Polygon):
+                self.canvas.create_polygon(points, outline=o.color, fill=fill, tags="pending")
+                continue
+            (x1, y1), (x2, y2) = points
+            if isinstance(o, Line):
+                self.canvas.create_line(x1, y1, x2, y2, fill=o.color, tags="pending")
+            else:
+                r = math.hypot(x2 - x1, y2 - y1)
+                self.canvas.create_oval(x1 - r, y1 - r, x1 + r, y1 + r, outline=o.color, fill=fill, tags="pending")
+        # a group is shown as the outline of its bounds
+        for g in self.scene.selected_groups:
+            for o in g.world_objects():
+                self.layer.erase(o)
+            x1, y1, x2, y2 = g.world_bounds()
+            corners = [m.apply_point(x, y) for x, y in ((x1, y1), (x2, y1), (x2, y2), (x1, y2))]
+            self.canvas.create_polygon(corners, outline=self.current_color, fill="", dash=(4, 2), tags="pending")
+        self.draw_selected_points(self.scene.selected_points, m)
+        # selected points are not in self.scene.points anymore
+        self.draw_points()
+        self.layer.flush()
+
+    # selected points are not in self.scene.points, the layer doesn't draw them: they get their own
+    # rectangles, placed by m, until they are merged back
+    def draw_selected_points(self, points, m):
+        self.canvas.delete("selected")
+        for p in points:
+            x, y = m.apply_point(p.x, p.y)
+            self.canvas.create_rectangle(round(x), round(y), round(x + 1), round(y + 1), fill=self.current_color, outline=self.current_color, tags="selected")
+
+    # rebuild the selection with the pending transform and rasterize it, once.
+    # returns False if there was nothing to apply
+    @profiler.timed()
+    def commit_selection(self):
+        if not self.scene.commit():
+            return False
+        self.canvas.delete("pending")
+        for o in self.scene.selection_objects():
+            self.layer.draw(o, self.rasterize(o), o.color)
+        # the free ones where the transform put them, the others are drawn with their objects
+        self.draw_selected_points([p for p in self.scene.selected_points if p not in self.scene.owners], self.view.affine())
+        self.layer.flush()
+        return True
+
+    @profiler.timed()
+    def commit_btn(self):
+        if self.scene.pending.is_identity():
+            messagebox.showinfo("Error", "No pending transformation.")
+            return
+        self.commit_selection()
         self.clear_after_operation()
         self.draw_objects()
 
-    def rotate_btn(self):
-        trans = Transformations(self.selected_points)
+    # grouping
+    def group_btn(self):
+        if not self.scene.selected_objects:
+            messagebox.showinfo("Error", "No lines or circles selected to group.")
+            return
+        self.commit_selection()
+        self.scene.group_selection()
 
-        if not self.selected_points and not self.selected_objects:
-            messagebox.showinfo("Error", "No points selected for rotation.")
+    def ungroup_btn(self):
+        if not self.scene.selected_groups:
+            messagebox.showinfo("Error", "No groups selected.")
             return
+        self.commit_selection()
+        self.scene.ungroup_selection()
 
-        angle = self.selector.get_angle()
+    @profiler.timed()
+    def translate_btn(self):
+        if not self.scene.has_selection():
+            messagebox.showinfo("Error", "No points selected for translation.")
+            return
 
-        # takes object center as origin
-        ox = sum(p.x for p in self.selected_points) / len(self.selected_points)
-        oy = sum(p.y for p in self.selected_points) / len(self.selected_points)
+        dx, dy = self.view.to_world_delta(self.final_x - self.initial_x, self.final_y - self.initial_y)
 
-        self.selected_points = trans.rotate(self.selected_points, angle, origin=(ox, oy))
+        self.defer(Affine.translation(dx, dy))
 
-        for so in self.selected_objects:
-            if isinstance(so, Line):
-                points = [so.p1, so.p2]
-                new_so_points = trans.rotate(points, angle, origin=(ox, oy))
-                new_so = Line(new_so_points[0], new_so_points[1], so.color) 
-            elif isinstance(so, Circle):
-                points = [so.p, so.r_point]
-                new_so_points = trans.rotate(points, angle, origin=(ox, oy))
-                new_so = Circle(new_so_points[0], new_so_points[1], so.color) 
-            self.selected_objects.remove(so)
-            self.selected_objects.append(new_so)
+    @profiler.timed()
+    def rotate_btn(self):
+        if not self.scene.has_selection():
+            messagebox.showinfo("Error", "No points selected for rotation.")
+            return
 
-        self.clear_after_operation()
-        self.draw_objects()
+        angle = self.selector.get_angle()
 
-    def scale_btn(self):
-        trans = Transformations(self.selected_points)
+        self.defer(Affine.rotation(angle, self.scene.selection_center()))
 
-        if not self.selected_points and not self.selected_objects:
+    @profiler.timed()
+    def scale_btn(self):
+        if not self.scene.has_selection():
             messagebox.showinfo("Error", "No points selected for scale.")
             return
-        
-        # takes object center as origin
-        ox = sum(p.x for p in self.selected_points) / len(self.selected_points)
-        oy = sum(p.y for p in self.selected_points) / len(self.selected_points)
-
-        self.selected_points = trans.scale(self.selected_points, self.sx, self.sy, (ox, oy))
-
-        for so in self.selected_objects:
-            if isinstance(so, Line):
-                points = [so.p1, so.p2]
-                new_so_points = trans.scale(points, self.sx, self.sy, (ox, oy))
-                new_so = Line(new_so_points[0], new_so_points[1], so.color) 
-            elif isinstance(so, Circle):
-                points = [so.p, so.r_point]
-                new_so_points = trans.scale(points, self.sx, self.sy, (ox, oy))
-                new_so = Circle(new_so_points[0], new_so_points[1], so.color) 
-            self.selected_objects.remove(so)
-            self.selected_objects.append(new_so)
 
-        self.clear_after_operation()
-        self.draw_objects()
+        self.defer(Affine.scaling(self.sx, self.sy, self.scene.selection_center()))
 
     def reflect_btn(self):
         # pop-up for axis selection
@@ -437,36 +587,16 @@ class GraphicsApp:
             ok_button = tk.Button(popup, text="OK", command=lambda: self.apply_reflection(select.get(), popup))
             ok_button.pack()
 
-        if not self.selected_points and not self.selected_objects:
+        if not self.scene.has_selection():
             messagebox.showinfo("Error", "No points selected for reflection.")
             return
 
         show_radio_selector()
+    @profiler.timed()
     def apply_reflection(self, select, popup):
         popup.destroy()
 
-        trans = Transformations(self.selected_points)
-
-        # takes object center as origin
-        ox = sum(p.x for p in self.selected_points) / len(self.selected_points)
-        oy = sum(p.y for p in self.selected_points) / len(self.selected_points)
-
-        self.selected_points = trans.reflect(self.selected_points, select, (ox, oy))
-
-        for so in self.selected_objects:
-            if isinstance(so, Line):
-                points = [so.p1, so.p2]
-                new_so_points = trans.reflect(points, select, (ox, oy))
-                new_so = Line(new_so_points[0], new_so_points[1], so.color) 
-            elif isinstance(so, Circle):
-                points = [so.p, so.r_point]
-                new_so_points = trans.reflect(points, select, (ox, oy))
-                new_so = Circle(new_so_points[0], new_so_points[1], so.color) 
-            self.selected_objects.remove(so)
-            self.selected_objects.append(new_so)
-
-        self.clear_after_operation()
-        self.draw_objects()
+        self.defer(Affine.reflection(select, self.scene.selection_center()))
 
     # rasterization
     def line_btn(self):
@@ -487,39 +617,48 @@ class GraphicsApp:
             ok_button = tk.Button(popup, text="OK", command=lambda: self.plot_line(select.get(), popup))
             ok_button.pack()
 
-        if len(self.selected_points) != 2:
+        if len(self.scene.selected_points) != 2:
             messagebox.showinfo("Error", "Please select only 2 points.")
             return
         show_radio_selector()
+    @profiler.timed()
     def plot_line(self, select, popup):
         popup.destroy()
+        self.commit_selection()
 
-        l = Line(self.selected_points[0], self.selected_points[1], self.current_color)
-        self.objects.append(l)
-        self.selected_points.remove(self.selected_points[1])
-        self.selected_points.remove(self.selected_points[0])
+        algorithm = "dda" if select == "dda" else "bresenham"
+        l = self.scene.add_line(self.scene.selected_points[0], self.scene.selected_points[1], self.current_color, algorithm)
 
-        if select == "dda":
-            line = l.dda()
-        else:
-            line = l.bresenham()
-        
-        self.draw_points(line, l.color)
+        self.draw_object(l, self.rasterize(l))
 
+    @profiler.timed()
     def circle_btn(self):
-        if len(self.selected_points) != 2:
+        if len(self.scene.selected_points) != 2:
             messagebox.showinfo("Error", "Please select only 2 points.")
             return
+        self.commit_selection()
         
         # 1st point selected is the center and the 2nd will define the radius length
-        c = Circle(self.selected_points[0], self.selected_points[1], self.current_color)
-        self.objects.append(c)
-        self.selected_points.remove(self.selected_points[1])
-        self.selected_points.remove(self.selected_points[0])
+        c = self.scene.add_circle(self.scene.selected_points[0], self.scene.selected_points[1], self.current_color)
 
-        circle = c.bresenham()
+        self.draw_object(c, self.rasterize(c))
 
-        self.draw_points(circle, c.color)
+    # 2 selected points give a filled circle (center, then radius), 3 or more a filled polygon
+    # with the points as vertices in the order they were selected
+    @profiler.timed()
+    def fill_btn(self):
+        if len(self.scene.selected_points) < 2:
+            messagebox.showinfo("Error", "Please select 2 points for a circle or 3+ for a polygon.")
+            return
+        self.commit_selection()
+
+        points = self.scene.selected_points
+        if len(points) == 2:
+            o = self.scene.add_filled_circle(points[0], points[1], self.current_color)
+        else:
+            o = self.scene.add_polygon(list(points), self.current_color)
+
+        self.draw_object(o, self.rasterize(o))
 
     # cutting
     def cut_btn(self):
@@ -541,25 +680,15 @@ class GraphicsApp:
             ok_button.pack()
 
         show_radio_selector()
+    @profiler.timed()
     def cut(self, select, popup):
         popup.destroy()
+        self.commit_selection()
 
-        xmin, ymin = self.selector.x1, self.selector.y1
-        xmax, ymax = self.selector.x2, self.selector.y2
-        
-        window_pmin = Point(xmin, ymin)
-        window_pmax = Point(xmax, ymax)
-        self.objects.extend(self.selected_objects)
-        cut = Cutting(self.objects, window_pmin, window_pmax)
+        xmin, ymin = self.view.to_world(self.selector.x1, self.selector.y1)
+        xmax, ymax = self.view.to_world(self.selector.x2, self.selector.y2)
 
-        if select == "cohen":
-            new_objects = cut.cohen()
-        else:
-            new_objects = cut.liang()
-        
-        self.objects.clear()
-        self.points.clear()
-        self.objects.extend(new_objects)
+        self.scene.cut(xmin, ymin, xmax, ymax, select)
         self.draw_objects()
         
     
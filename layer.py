@@ -0,0 +1,350 @@
+import math
+import tkinter as tk
+from collections import defaultdict
+
+import numpy as np
+
+from framebuffer import FrameBuffer
+from parallel import PAD
+from rasterization.runs import Runs, pixels_in
+from spatial import GridIndex
+
+# retained drawing layer: every object keeps its own canvas items under a tag,
+# so a redraw only touches the objects that were added, changed or removed
+class CanvasLayer:
+    def __init__(self, canvas):
+        self.canvas = canvas
+        self.items = {} # object -> canvas tag
+        self.next_tag = 0
+        self.points = {} # free point -> its canvas item
+        self.point_color = None
+        self.points_under = False # objects were drawn over the point items since the last flush
+
+    def has(self, o):
+        return o in self.items
+
+    # create the items of one object (replacing the old ones if already drawn).
+    # pixels is a Point list, or Runs: one line item per horizontal/vertical run, one oval per single pixel
+    def draw(self, o, pixels, color):
+        self.erase(o)
+        tag = f"obj{self.next_tag}"
+        self.next_tag += 1
+        if isinstance(pixels, Runs):
+            for y, x0, x1 in pixels.rows:
+                self.canvas.create_line(x0, y, x1 + 1, y, fill=color, tags=tag)
+            for x, y0, y1 in pixels.columns:
+                self.canvas.create_line(x, y0, x, y1 + 1, fill=color, tags=tag)
+            for x, y in zip(pixels.xs.tolist(), pixels.ys.tolist()):
+                self.canvas.create_oval(x, y, x + 1, y + 1, fill=color, outline=color, tags=tag)
+        else:
+            for p in pixels:
+                self.canvas.create_oval(p.x, p.y, p.x + 1, p.y + 1, fill=color, outline=color, tags=tag)
+        self.items[o] = tag
+        if self.points:
+            self.points_under = True
+
+    def erase(self, o):
+        tag = self.items.pop(o, None)
+        if tag is not None:
+            self.canvas.delete(tag)
+
+    # one item per free point: only the points that are new get an item and the ones that are gone
+    # lose theirs (all of them are redrawn if the color changes). position maps a point to the canvas
+    def draw_points(self, points, color, position=None):
+        if color != self.point_color:
+            self.canvas.delete("point")
+            self.points.clear()
+            self.point_color = color
+        live = points if isinstance(points, dict) else dict.fromkeys(points)
+        for p in self.points.keys() - live.keys():
+            self.canvas.delete(self.points.pop(p))
+        self.add_points(live.keys() - self.points.keys(), position)
+
+    # only the points added and removed since the last call, in the current color
+    def change_points(self, added, removed, position=None):
+        for p in removed:
+            item = self.points.pop(p, None)
+            if item is not None:
+                self.canvas.delete(item)
+        self.add_points([p for p in added if p not in self.points], position)
+
+    def add_points(self, points, position):
+        color = self.point_color
+        for p in points:
+            x, y = position(p.x, p.y) if position else (p.x, p.y)
+            self.points[p] = self.canvas.create_rectangle(round(x), round(y), round(x + 1), round(y + 1), fill=color, outline=color, tags="point")
+
+    # make the canvas match `objects`: erase the ones that are gone and draw only the new ones
+    def sync(self, objects, rasterize, project=None):
+        live = set(objects)
+        for o in [o for o in self.items if o not in live]:
+            self.erase(o)
+        for o in objects:
+            if o not in self.items:
+                self.draw(o, rasterize(o), o.color)
+
+    # forget every item (used after canvas.delete("all")). the point color is forgotten with the
+    # points, so the next draw_points draws all of them
+    def clear(self):
+        self.items.clear()
+        self.points.clear()
+        self.point_color = None
+
+    # remove every object and the points (the view changed, all of them move), the point color too
+    def reset(self):
+        for tag in self.items.values():
+            self.canvas.delete(tag)
+        self.items.clear()
+        self.canvas.delete("point")
+        self.points.clear()
+        self.point_color = None
+
+    # the point items go back on top once, however many objects were drawn
+    def flush(self):
+        if self.points_under:
+            self.canvas.tag_raise("point")
+            self.points_under = False
+
+# same interface as CanvasLayer, but objects are written into a FrameBuffer which is
+# shown on the canvas through a single PhotoImage item.
+# every draw/erase marks its bounds dirty and flush only uploads the dirty rectangles (bounds that
+# overlap or are close are merged, the others are uploaded apart); erasing
+# only restores the objects the grid finds under the erased bounds, tested against the hole as pixel arrays.
+# free points are indexed too, so redrawing an object only looks at the points under it
+# with a renderer (parallel.TileRenderer), a sync with many new objects draws them all in one
+# parallel pass; their pixels are only rasterized again here if they have to be erased
+class FrameBufferLayer:
+    def __init__(self, canvas, width, height, renderer=None):
+        self.canvas = canvas
+        self.fb = FrameBuffer(width, height)
+        self.image = tk.PhotoImage(width=width, height=height)
+        self.items = {} # object -> (pixels or None if not kept, color, bbox, draw order)
+        self.index = GridIndex()
+        self.next_order = 0
+        self.points = {} # free point -> its pixel
+        self.point_pixels = defaultdict(int) # pixel -> number of free points on it
+        self.point_index = GridIndex() # the pixels of point_pixels
+        self.point_color = None
+        self.dirty = [(0, 0, width, height)] # disjoint (x1, y1, x2, y2) not uploaded yet, x2/y2 excluded
+        self.renderer = renderer
+        self.rasterize = None
+        self.show()
+
+    def show(self):
+        self.item = self.canvas.create_image(0, 0, anchor="nw", image=self.image)
+        self.canvas.tag_lower(self.item)
+
+    def has(self, o):
+        return o in self.items
+
+    def store(self, o, pixels, color, bbox):
+        self.items[o] = (pixels, color, bbox, self.next_order)
+        self.next_order += 1
+        self.index.insert(o, bbox)
+        self.mark(bbox)
+
+    gap = 16 # dirty rectangles closer than this are uploaded as one
+    max_rects = 8 # past this many, they are merged into their union
+
+    # add a pixel bbox to the dirty rectangles (pixels are rounded, hence the margin): it absorbs
+    # the rectangles it overlaps or is close to, so the list stays disjoint
+    def mark(self, bbox):
+        x1, y1, x2, y2 = bbox
+        x1, y1 = max(int(math.floor(x1)) - 1, 0), max(int(math.floor(y1)) - 1, 0)
+        x2, y2 = min(int(math.ceil(x2)) + 2, self.fb.width), min(int(math.ceil(y2)) + 2, self.fb.height)
+        if x1 >= x2 or y1 >= y2:
+            return
+        merged = True
+        while merged:
+            merged = False
+            for other in self.dirty:
+                if self.near((x1, y1, x2, y2), other):
+                    self.dirty.remove(other)
+                    x1, y1, x2, y2 = min(x1, other[0]), min(y1, other[1]), max(x2, other[2]), max(y2, other[3])
+                    merged = True
+                    break
+        self.dirty.append((x1, y1, x2, y2))
+        if len(self.dirty) > self.max_rects:
+            xs1, ys1, xs2, ys2 = zip(*self.dirty)
+            self.dirty = [(min(xs1), min(ys1), max(xs2), max(ys2))]
+
+    def near(self, a, b):
+        return (a[0] <= b[2] + self.gap and b[0] <= a[2] + self.gap
+                and a[1] <= b[3] + self.gap and b[1] <= a[3] + self.gap)
+
+    # pixels is a Point list, or Runs (written one slice per run)
+    def draw(self, o, pixels, color):
+        self.erase(o)
+        if not len(pixels):
+            return
+        if isinstance(pixels, Runs):
+            bbox = pixels.bounds()
+            self.store(o, pixels, color, bbox)
+            self.fb.fill_runs(pixels, color)
+            # free points stay on top, the ones the index finds in the bounds are tested against
+            # the pixels of the runs around them
+            xs, ys = self.point_arrays(*bbox)
+            if len(xs):
+                covered = pixels.clip(xs.min(), ys.min(), xs.max() + 1, ys.max() + 1).pixel_arrays()
+                hit = pixels_in(xs, ys, *covered)
+                self.fb.plot_arrays(xs[hit], ys[hit], self.point_color)
+            return
+        xs = [p.x for p in pixels]
+        ys = [p.y for p in pixels]
+        self.store(o, pixels, color, (min(xs), min(ys), max(xs), max(ys)))
+        self.fb.plot_points(pixels, color)
+        # free points stay on top
+        if self.point_pixels:
+            self.plot_point_pixels({(round(p.x), round(p.y)) for p in pixels} & self.point_pixels.keys())
+
+    # paint the background over the object, then restore whatever was under it: the pixels
+    # of the hole are replotted by the overlapping objects, in the order they were drawn
+    def erase(self, o):
+        item = self.items.pop(o, None)
+        if item is None:
+            return
+        self.index.remove(o)
+        pixels, _, bbox, _ = item
+        self.mark(bbox)
+        pixels = self.pixels(o, pixels)
+        if isinstance(pixels, Runs):
+            self.fb.fill_runs(pixels, self.fb.bg_color)
+        else:
+            self.fb.plot_points(pixels, self.fb.bg_color)
+        self.restore(self.arrays(pixels), bbox)
+
+    # replot what is left under the hole, (xs, ys) pixels already painted with the background:
+    # the objects overlapping it in the order they were drawn, then the free points.
+    # only the pixels of the others inside the bounds of the hole are tested against it
+    def restore(self, hole, bbox):
+        hx, hy = hole
+        if not len(hx):
+            return
+        x1, y1, x2, y2 = int(hx.min()), int(hy.min()), int(hx.max()), int(hy.max())
+        for other in sorted(self.index.query(*bbox), key=lambda k: self.items[k][3]):
+            pixels, color, _, _ = self.items[other]
+            pixels = self.pixels(other, pixels)
+            if isinstance(pixels, Runs):
+                pixels = pixels.clip(x1, y1, x2 + 1, y2 + 1)
+            xs, ys = self.arrays(pixels)
+            keep = pixels_in(xs, ys, hx, hy)
+            self.fb.plot_arrays(xs[keep], ys[keep], color)
+        xs, ys = self.point_arrays(x1, y1, x2, y2)
+        if len(xs):
+            keep = pixels_in(xs, ys, hx, hy)
+            self.fb.plot_arrays(xs[keep], ys[keep], self.point_color)
+
+    def plot_point_pixels(self, pixels):
+        for x, y in pixels:
+            self.fb.plot(x, y, self.point_color)
+
+    def pixels(self, o, pixels):
+        return self.rasterize(o) if pixels is None else pixels
+
+    # (xs, ys) int arrays of Runs or of a Point list (rounded like the buffer plots them)
+    def arrays(self, pixels):
+        if isinstance(pixels, Runs):
+            return pixels.pixel_arrays()
+        return (np.array([round(p.x) for p in pixels], dtype=np.int64),
+                np.array([round(p.y) for p in pixels], dtype=np.int64))
+
+    # (xs, ys) int arrays of the free point pixels in the bounds, found through the index
+    def point_arrays(self, x1, y1, x2, y2):
+        found = self.point_index.query(x1, y1, x2, y2)
+        return (np.array([x for x, _ in found], dtype=np.int64),
+                np.array([y for _, y in found], dtype=np.int64))
+
+    # one framebuffer write per free point: only the points that are new are plotted and the pixels
+    # of the ones that are gone are restored (all of them if the color changes).
+    # position maps a point to the buffer
+    def draw_points(self, points, color, position=None):
+        if color != self.point_color:
+            self.erase_points(list(self.points))
+            self.point_color = color
+        live = points if isinstance(points, dict) else dict.fromkeys(points)
+        gone = self.points.keys() - live.keys()
+        if gone:
+            self.erase_points(gone)
+        self.add_points(live.keys() - self.points.keys(), position)
+
+    # only the points added and removed since the last call, in the current color
+    def change_points(self, added, removed, position=None):
+        gone = [p for p in removed if p in self.points]
+        if gone:
+            self.erase_points(gone)
+        self.add_points([p for p in added if p not in self.points], position)
+
+    def add_points(self, points, position):
+        for p in points:
+            x, y = position(p.x, p.y) if position else (p.x, p.y)
+            pixel = (round(x), round(y))
+            self.points[p] = pixel
+            if not self.point_pixels[pixel]:
+                self.point_index.insert(pixel, (*pixel, *pixel))
+            self.point_pixels[pixel] += 1
+            self.fb.plot(*pixel, self.point_color)
+            self.mark((*pixel, *pixel))
+
+    def erase_points(self, points):
+        hole = set()
+        for p in points:
+            pixel = self.points.pop(p)
+            self.point_pixels[pixel] -= 1
+            if not self.point_pixels[pixel]:
+                del self.point_pixels[pixel]
+                self.point_index.remove(pixel)
+                hole.add(pixel)
+        if not hole:
+            return
+        for x, y in hole:
+            self.fb.plot(x, y, self.fb.bg_color)
+        xs = np.array([x for x, _ in hole], dtype=np.int64)
+        ys = np.array([y for _, y in hole], dtype=np.int64)
+        bbox = (int(xs.min()), int(ys.min()), int(xs.max()), int(ys.max()))
+        self.mark(bbox)
+        self.restore((xs, ys), bbox)
+
+    # project maps an object to the one actually drawn (in screen coordinates) for the renderer,
+    # None when nothing of it is on screen
+    def sync(self, objects, rasterize, project=None):
+        self.rasterize = rasterize
+        live = set(objects)
+        for o in [o for o in self.items if o not in live]:
+            self.erase(o)
+        new = [o for o in objects if o not in self.items]
+        if self.renderer is not None and len(new) >= self.renderer.threshold:
+            screen = [project(o) for o in new] if project else new
+            new, screen = [o for o, s in zip(new, screen) if s is not None], [s for s in screen if s is not None]
+            self.renderer.draw_objects(self.fb, screen)
+            for o, s in zip(new, screen):
+                x1, y1, x2, y2 = s.bounds()
+                self.store(o, None, o.color, (x1 - PAD, y1 - PAD, x2 + PAD, y2 + PAD))
+            self.plot_point_pixels(self.point_pixels)
+            return
+        for o in new:
+            self.draw(o, rasterize(o), o.color)
+
+    # the canvas was wiped: start again from a blank buffer and a new image item
+    def clear(self):
+        self.reset()
+        self.show()
+
+    # remove every object and the points (and their color, like CanvasLayer.reset), the image item stays
+    def reset(self):
+        self.items.clear()
+        self.index.clear()
+        self.points.clear()
+        self.point_pixels.clear()
+        self.point_index.clear()
+        self.point_color = None
+        self.fb.fill()
+        self.dirty = [(0, 0, self.fb.width, self.fb.height)]
+
+    # upload the dirty rectangles to the PhotoImage, the whole buffer in one call if that's all of it
+    def flush(self):
+        if self.dirty == [(0, 0, self.fb.width, self.fb.height)]:
+            self.image.configure(data=self.fb.to_ppm(), format="PPM")
+        else:
+            for rect in self.dirty:
+                self.image.put(self.fb.to_ppm(rect), to=rect[:2])
+        self.dirty = []
@@ -1,8 +1,14 @@
 from interface import GraphicsApp
+from profiler import profiler
 
+import sys
 import tkinter as tk
 
+# python main.py [--profile]: start with the instrumentation HUD on and print the report on exit
 if __name__ == "__main__":
+    profile = "--profile" in sys.argv
     root = tk.Tk()
-    app = GraphicsApp(root)
+    app = GraphicsApp(root, profile=profile)
     root.mainloop()
+    if profiler.stats:
+        print(profiler.report())
@@ -0,0 +1,98 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from framebuffer import fill_rows, rgb
+from rasterization.fill import Filled
+from renderer import Renderer
+
+# the canvas is cut into tiles, every tile gets the objects whose bounds overlap it and is
+# rasterized by a worker process straight into a shared memory copy of the buffer.
+# tiles don't overlap, so workers never write the same pixel and the draw order inside
+# a tile is the scene order, the result is the same as the serial Renderer
+
+# DDA takes one sample past p2 and pixels are rounded, bounds are padded by this much
+PAD = 2
+
+# worker: plot `objects` into the (x1, y1, x2, y2) tile of the shared buffer
+def rasterize_tile(name, width, height, tile, objects):
+    # the pool shares the parent's resource tracker, so the parent's unlink is the only one
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        pixels = np.ndarray((height, width, 3), dtype=np.uint8, buffer=shm.buf)
+        x1, y1, x2, y2 = tile
+        for o in objects:
+            if isinstance(o, Filled):
+                fill_rows(pixels, o.spans().clip(*tile), rgb(o.color))
+                continue
+            xs, ys = o.pixel_arrays()
+            keep = (xs >= x1) & (xs < x2) & (ys >= y1) & (ys < y2)
+            pixels[ys[keep], xs[keep]] = rgb(o.color)
+        del pixels
+    finally:
+        shm.close()
+
+class TileRenderer(Renderer):
+    # tile is (width, height), by default full width bands, two per worker: an object is rasterized
+    # once for every tile it overlaps, so few tall tiles waste less than many small ones.
+    # below `threshold` objects the pool costs more than it saves and the serial path is used
+    def __init__(self, width=800, height=600, bg="white", tile=None, workers=None, threshold=500):
+        super().__init__(width, height, bg)
+        self.workers = workers or os.cpu_count() or 1
+        self.tile = tile or (width, -(-height // (2 * self.workers)))
+        self.threshold = threshold
+        self.pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+
+    def tiles(self, fb):
+        tw, th = self.tile
+        return [(x, y, min(x + tw, fb.width), min(y + th, fb.height))
+                for y in range(0, fb.height, th) for x in range(0, fb.width, tw)]
+
+    # tile -> the objects overlapping it, in scene order
+    def assign(self, fb, objects):
+        tw, th = self.tile
+        cols = -(-fb.width // tw)
+        rows = -(-fb.height // th)
+        buckets = [[] for _ in range(cols * rows)]
+        for o in objects:
+            x1, y1, x2, y2 = o.bounds()
+            c1, c2 = max(int(x1 - PAD) // tw, 0), min(int(x2 + PAD) // tw, cols - 1)
+            r1, r2 = max(int(y1 - PAD) // th, 0), min(int(y2 + PAD) // th, rows - 1)
+            for r in range(r1, r2 + 1):
+                for c in range(c1, c2 + 1):
+                    buckets[r * cols + c].append(o)
+        return buckets
+
+    def draw_objects(self, fb, objects):
+        objects = list(objects)
+        if len(objects) < self.threshold or self.workers < 2:
+            return super().draw_objects(fb, objects)
+
+        if self.pool is None:
+            self.pool = ProcessPoolExecutor(self.workers)
+
+        shm = shared_memory.SharedMemory(create=True, size=len(fb.data))
+        try:
+            shm.buf[:len(fb.data)] = fb.data
+            jobs = [self.pool.submit(rasterize_tile, shm.name, fb.width, fb.height, tile, bucket)
+                    for tile, bucket in zip(self.tiles(fb), self.assign(fb, objects)) if bucket]
+            for job in jobs:
+                job.result()
+            # composite: tiles were written in place, the shared copy is the new buffer
+            fb.data[:] = shm.buf[:len(fb.data)]
+        finally:
+            shm.close()
+            shm.unlink()
@@ -1,7 +1,80 @@
+from array import array
+
+import numpy as np
+
 class Point:
+    __slots__ = ("x", "y")
+
     def __init__(self, x: float, y: float):
         self.x = x
         self.y = y
 
     def __repr__(self):
         return f"Point({self.x}, {self.y})"
+
+# struct of arrays: x and y of many points in two parallel array('d') columns (16 bytes per point)
+class PointSet:
+    __slots__ = ("xs", "ys")
+
+    # xs and ys may be any iterable of numbers or the raw bytes of float64 values
+    def __init__(self, xs=(), ys=()):
+        self.xs = array("d", xs)
+        self.ys = array("d", ys)
+        if len(self.xs) != len(self.ys):
+            raise ValueError("xs and ys must have the same length")
+
+    @classmethod
+    def from_points(cls, points):
+        return cls([p.x for p in points], [p.y for p in points])
+
+    # copy two numpy arrays into a new set
+    @classmethod
+    def from_arrays(cls, xs, ys):
+        return cls(np.asarray(xs, dtype=np.float64).tobytes(), np.asarray(ys, dtype=np.float64).tobytes())
+
+    def __len__(self):
+        return len(self.xs)
+
+    def __iter__(self):
+        for x, y in zip(self.xs, self.ys):
+            yield Point(x, y)
+
+    def __getitem__(self, i):
+        return Point(self.xs[i], self.ys[i])
+
+    def __repr__(self):
+        return f"PointSet({len(self)} points)"
+
+    def append(self, p):
+        self.xs.append(p.x)
+        self.ys.append(p.y)
+
+    def extend(self, points):
+        for p in points:
+            self.append(p)
+
+    # numpy views sharing the memory of the columns (no copy). the set can't grow
+    # while a view is alive
+    def arrays(self):
+        return np.frombuffer(self.xs, dtype=np.float64), np.frombuffer(self.ys, dtype=np.float64)
+
+# steps rasterized at a time by the lazy rasterizers
+CHUNK = 4096
+
+# one (xs, ys) pair from a stream of (xs, ys) chunks
+def join(chunks):
+    chunks = list(chunks)
+    if len(chunks) == 1:
+        return chunks[0]
+    return np.concatenate([xs for xs, _ in chunks]), np.concatenate([ys for _, ys in chunks])
+
+# Points of a stream of (xs, ys) chunks, built one chunk at a time
+def iter_points(chunks):
+    for xs, ys in chunks:
+        yield from from_arrays(xs, ys)
+
+# build a Point list from two coordinate arrays (numpy arrays or lists)
+def from_arrays(xs, ys):
+    if hasattr(xs, "tolist"):
+        xs, ys = xs.tolist(), ys.tolist()
+    return [Point(x, y) for x, y in zip(xs, ys)]
@@ -0,0 +1,81 @@
+import numpy as np
+
+from rasterization.line import Line
+from rasterization.fill import Polygon
+
+# live preview of a transform on the selection while the selector is dragged, rotated or resized.
+# the selection is shown through cheap proxies (a canvas line per line, an oval outline per circle,
+# a polygon outline per polygon, a small rectangle per point) created once on start; every frame only their coords change.
+# past `limit` proxies the selection is decimated, one object/point out of every k is shown
+class Preview:
+    def __init__(self, canvas, limit=500):
+        self.canvas = canvas
+        self.limit = limit
+        self.active = False
+        self.items = [] # canvas ids: lines, then circles, then points
+        self.polygons = [] # (canvas id, first vertex, number of vertices)
+        self.counts = (0, 0, 0)
+        self.xs = self.ys = None # control points, 2 per line/circle, 1 per point, then the polygon vertices
+
+    def start(self, scene, point_color):
+        self.stop()
+        objects = self.sample(scene.selection_objects())
+        lines = [o for o in objects if isinstance(o, Line)]
+        polygons = [o for o in objects if isinstance(o, Polygon)]
+        circles = [o for o in objects if not isinstance(o, (Line, Polygon))]
+        points = self.sample([p for p in scene.selected_points if p not in scene.owners])
+
+        control = [p for o in lines + circles for p in o.control_points()] + points
+        start = len(control)
+        for o in polygons:
+            vertices = o.control_points()
+            item = self.canvas.create_polygon(0, 0, 0, 0, 0, 0, outline=o.color, fill="", tags="preview")
+            self.polygons.append((item, start, len(vertices)))
+            control += vertices
+            start += len(vertices)
+        self.xs = np.array([p.x for p in control], dtype=float)
+        self.ys = np.array([p.y for p in control], dtype=float)
+
+        self.items = [self.canvas.create_line(0, 0, 0, 0, fill=o.color, tags="preview") for o in lines]
+        self.items += [self.canvas.create_oval(0, 0, 0, 0, outline=o.color, tags="preview") for o in circles]
+        self.items += [self.canvas.create_rectangle(0, 0, 0, 0, fill=point_color, outline=point_color, tags="preview") for _ in points]
+        self.counts = (len(lines), len(circles), len(points))
+        self.active = True
+
+    # evenly spaced subset of at most `limit` items
+    def sample(self, items):
+        if len(items) <= self.limit:
+            return list(items)
+        step = -(-len(items) // self.limit)
+        return items[::step]
+
+    # move the proxies to where transform `m` puts the selection
+    def show(self, m):
+        if not self.active:
+            return
+        xs, ys = m.apply_arrays(self.xs, self.ys)
+        n_lines, n_circles, n_points = self.counts
+        split = 2 * (n_lines + n_circles)
+        coords = self.canvas.coords
+
+        # lines: the two control points as they are
+        segs = np.column_stack((xs[:2 * n_lines:2], ys[:2 * n_lines:2], xs[1:2 * n_lines:2], ys[1:2 * n_lines:2]))
+        # circles: bounding box of the center and the transformed radius
+        cx, cy = xs[2 * n_lines:split:2], ys[2 * n_lines:split:2]
+        r = np.hypot(xs[2 * n_lines + 1:split:2] - cx, ys[2 * n_lines + 1:split:2] - cy)
+        boxes = np.column_stack((cx - r, cy - r, cx + r, cy + r))
+        # points: rounded like the points drawn by the layer
+        px, py = np.round(xs[split:split + n_points]), np.round(ys[split:split + n_points])
+        rects = np.column_stack((px, py, px + 1, py + 1))
+
+        for item, c in zip(self.items, np.concatenate((segs, boxes, rects)).tolist()):
+            coords(item, *c)
+        for item, start, n in self.polygons:
+            coords(item, *np.column_stack((xs[start:start + n], ys[start:start + n])).ravel().tolist())
+
+    def stop(self):
+        if self.active:
+            self.canvas.delete("preview")
+        self.items = []
+        self.polygons = []
+        self.active = False
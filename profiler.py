@@ -0,0 +1,174 @@
+import functools
+import json
+import time
+from collections import deque
+
+# opt-in instrumentation for the interactive entry points.
+# methods decorated with @profiler.timed() cost one flag test while it is disabled; once enabled
+# every call is timed and the canvas items it creates/deletes are counted, the results show up
+# in an on-canvas HUD and in report()/dump()
+
+CREATE_METHODS = ("create_oval", "create_rectangle", "create_line", "create_polygon", "create_image", "create_text")
+
+class Stat:
+    __slots__ = ("calls", "total", "max", "created", "deleted")
+
+    def __init__(self):
+        self.calls = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.created = 0
+        self.deleted = 0
+
+    def as_dict(self):
+        return {
+            "calls": self.calls,
+            "total_ms": self.total * 1000,
+            "mean_ms": self.total / self.calls * 1000 if self.calls else 0.0,
+            "max_ms": self.max * 1000,
+            "created": self.created,
+            "deleted": self.deleted,
+        }
+
+class Profiler:
+    def __init__(self, frames=30):
+        self.enabled = False
+        self.stats = {} # operation name -> Stat
+        self.active = [] # Stat of the operations running right now (nested calls)
+        self.frames = deque(maxlen=frames) # duration of the last top level operations
+        self.last = None # (name, seconds, created, deleted) of the last top level operation
+        self.canvas = None
+        self.originals = {} # canvas method name -> the unwrapped bound method
+        self.scene = None
+
+    # Switching -------------------------------------------------------------------------------------------------------------------
+    # start timing, canvas item counts and the HUD go to `canvas`, the HUD also shows the size of `scene`
+    def enable(self, canvas=None, scene=None):
+        if self.enabled:
+            self.disable()
+        self.enabled = True
+        self.scene = scene
+        self.canvas = canvas
+        if canvas is not None:
+            self.wrap_canvas(canvas)
+            self.draw_hud()
+
+    def disable(self):
+        if self.canvas is not None:
+            self.originals["delete"]("hud")
+            # drop the instance wrappers, the class methods show through again
+            for name in self.originals:
+                delattr(self.canvas, name)
+        self.originals.clear()
+        self.canvas = None
+        self.scene = None
+        self.active.clear()
+        self.enabled = False
+
+    def toggle(self, canvas=None, scene=None):
+        if self.enabled:
+            self.disable()
+        else:
+            self.enable(canvas, scene)
+
+    def reset(self):
+        self.stats.clear()
+        self.frames.clear()
+        self.last = None
+
+    # Measuring -------------------------------------------------------------------------------------------------------------------
+    # decorator, the operation is recorded under `name` (the function name by default)
+    def timed(self, name=None):
+        def decorate(fn):
+            key = name or fn.__name__
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return fn(*args, **kwargs)
+                return self.measure(key, fn, args, kwargs)
+            return wrapper
+        return decorate
+
+    def measure(self, key, fn, args, kwargs):
+        stat = self.stats.get(key)
+        if stat is None:
+            stat = self.stats[key] = Stat()
+        created, deleted = stat.created, stat.deleted
+        self.active.append(stat)
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.active.pop()
+            stat.calls += 1
+            stat.total += elapsed
+            stat.max = max(stat.max, elapsed)
+            if not self.active:
+                self.frames.append(elapsed)
+                self.last = (key, elapsed, stat.created - created, stat.deleted - deleted)
+                self.draw_hud()
+
+    # item counts go to every operation running, so nested calls count in their callers too
+    def count(self, created=0, deleted=0):
+        for stat in self.active:
+            stat.created += created
+            stat.deleted += deleted
+
+    def wrap_canvas(self, canvas):
+        def creator(create):
+            def wrapper(*args, **kwargs):
+                self.count(created=1)
+                return create(*args, **kwargs)
+            return wrapper
+
+        def delete(*tags):
+            if self.active:
+                self.count(deleted=sum(len(canvas.find_withtag(t)) for t in tags))
+            return self.originals["delete"](*tags)
+
+        for name in CREATE_METHODS:
+            self.originals[name] = getattr(canvas, name)
+            setattr(canvas, name, creator(self.originals[name]))
+        self.originals["delete"] = canvas.delete
+        canvas.delete = delete
+
+    # Output ----------------------------------------------------------------------------------------------------------------------
+    def hud_text(self):
+        lines = []
+        if self.last:
+            name, elapsed, created, deleted = self.last
+            lines.append(f"{name}: {elapsed * 1000:.1f} ms  +{created} -{deleted} items")
+        if self.frames:
+            lines.append(f"avg {sum(self.frames) / len(self.frames) * 1000:.1f} ms  max {max(self.frames) * 1000:.1f} ms (last {len(self.frames)})")
+        if self.canvas is not None:
+            lines.append(f"canvas items: {len(self.canvas.find_all())}")
+        if self.scene is not None:
+            s = self.scene
+            lines.append(f"points: {len(s.points)} ({len(s.selected_points)} selected)  objects: {len(s.objects)} ({len(s.selected_objects)} selected)")
+        return "\n".join(lines) or "profiling"
+
+    # the HUD is created with the unwrapped canvas methods so it never shows up in the counts
+    def draw_hud(self):
+        if self.canvas is None:
+            return
+        self.originals["delete"]("hud")
+        self.originals["create_text"](8, 8, anchor="nw", text=self.hud_text(), fill="gray25", font=("TkFixedFont", 9), tags="hud")
+
+    def as_dict(self):
+        return {name: stat.as_dict() for name, stat in self.stats.items()}
+
+    # text table sorted by total time
+    def report(self):
+        rows = sorted(self.as_dict().items(), key=lambda item: item[1]["total_ms"], reverse=True)
+        lines = [f"{'operation':24} {'calls':>7} {'total ms':>10} {'mean ms':>9} {'max ms':>9} {'created':>9} {'deleted':>9}"]
+        for name, s in rows:
+            lines.append(f"{name:24} {s['calls']:>7} {s['total_ms']:10.2f} {s['mean_ms']:9.2f} {s['max_ms']:9.2f} {s['created']:>9} {s['deleted']:>9}")
+        return "\n".join(lines)
+
+    def dump(self, path):
+        with open(path, "w") as f:
+            json.dump(self.as_dict(), f, indent=2)
+
+profiler = Profiler()
@@ -0,0 +1,68 @@
+import sys
+from collections import OrderedDict
+
+import numpy as np
+
+# bytes held by a cached value: numpy arrays by their buffer, tuples and objects with __slots__
+# (Spans, Runs, Point) by their items, lists (Point lists) by their first item times their length
+def nbytes(value):
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, tuple):
+        return sys.getsizeof(value) + sum(nbytes(v) for v in value)
+    if isinstance(value, list):
+        return sys.getsizeof(value) + (len(value) * nbytes(value[0]) if value else 0)
+    if hasattr(value, "__slots__"):
+        return sys.getsizeof(value) + sum(nbytes(getattr(value, name)) for name in value.__slots__)
+    return sys.getsizeof(value)
+
+# shared LRU of raster patterns (pixel offsets from the primitive's anchor point).
+# patterns only depend on the shape of a primitive, so a translated copy reuses them
+# and only pays for the offset. bounded by the bytes of the stored entries (see nbytes),
+# so arrays, spans and Point lists are weighed in the same unit.
+# an entry is a tuple, usually (xs, ys)
+class PatternCache:
+    def __init__(self, max_bytes=16 << 20):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict() # key -> (tuple, its size in bytes)
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, compute):
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+        self.misses += 1
+        pattern = compute()
+        size = nbytes(pattern)
+        if size <= self.max_bytes:
+            self.entries[key] = (pattern, size)
+            self.bytes += size
+            self.evict()
+        return pattern
+
+    # drop least recently used patterns until under the bound
+    def evict(self):
+        while self.bytes > self.max_bytes:
+            _, (_, size) = self.entries.popitem(last=False)
+            self.bytes -= size
+
+    def discard(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= entry[1]
+
+    def clear(self):
+        self.entries.clear()
+        self.bytes = 0
+
+patterns = PatternCache()
+
+# the rasters of placed primitives (Point lists, runs, spans), keyed on their geometry so two
+# primitives in the same place share them. bounded in bytes like the patterns, a raster that is
+# evicted is computed again from its pattern
+rasters = PatternCache(max_bytes=32 << 20)
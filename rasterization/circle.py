@@ -1,6 +1,49 @@
 import math
 
-from point import Point
+import numpy as np
+
+from point import CHUNK, Point, from_arrays, iter_points, join
+from rasterization.cache import patterns, rasters
+from rasterization.runs import pixel_runs
+
+# y of the first octant columns x of a Bresenham circle, solved from the decision variable
+def octant_y(r, x):
+    # y goes down when y^2 + (y - 1)^2 >= 2r^2 - 2x^2
+    t = 2 * r * r - 2 * x * x
+    g = lambda y: y * y + (y - 1) * (y - 1)
+    y = r - np.maximum(np.ceil(r - (1 + np.sqrt(np.maximum(2 * t - 1, 0))) / 2), 0)
+    y = np.where(g(y) >= t, y - 1, y)
+    y = np.where((y < r) & (g(y + 1) < t), y + 1, y)
+    return np.where(x == 0, r, y)
+
+# pixel offsets of a Bresenham circle from its center, 8 per step in the same order as the original loop,
+# yielded `chunk` steps at a time. only the first octant is computed, then mirrored eight ways
+def circle_chunks(r, chunk=CHUNK):
+    n = int(r / math.sqrt(2)) + 3
+    prev = None # y of the last column of the previous chunk
+    for start in range(0, n, chunk):
+        x = np.arange(start, min(start + chunk, n), dtype=np.float64)
+        solved = octant_y(r, x)
+        # y can't drop more than one pixel per step
+        y = solved.copy()
+        y[1:] = np.maximum(solved[1:], solved[:-1] - 1)
+        if prev is not None:
+            y[0] = max(solved[0], prev - 1)
+        prev = solved[-1]
+
+        # the loop stops at the first step where x >= y
+        last = np.nonzero(x >= y)[0]
+        if len(last):
+            x, y = x[:last[0] + 1], y[:last[0] + 1]
+
+        ox = np.stack([x, -x, x, -x, y, -y, y, -y], axis=1).ravel()
+        oy = np.stack([y, y, -y, -y, x, x, -x, -x], axis=1).ravel()
+        yield ox, oy
+        if len(last):
+            return
+
+def circle_pattern(r):
+    return join(circle_chunks(r))
 
 class Circle:
     def __init__(self, p, r, color):
@@ -9,7 +52,6 @@ class Circle:
             self.r_point = r
             self.r = math.sqrt(abs(p.x - r.x)**2 + abs(p.y - r.y)**2)
             self.color = color
-            self.circ = []
         else:
             raise TypeError("p and r must be Point type")
         
@@ -19,30 +61,99 @@ class Circle:
     def get_pixels(self):
         return self.bresenham()
 
+    # returns (xs, ys) int32 arrays
+    def pixel_arrays(self):
+        return self.bresenham_array()
+
+    # the pixels of pixel_arrays, in the same order, as (xs, ys) chunks computed only when they are asked for
+    def iter_pixel_arrays(self, chunk=CHUNK):
+        for ox, oy in circle_chunks(self.r, chunk):
+            yield np.rint(self.p.x + ox).astype(np.int32), np.rint(self.p.y + oy).astype(np.int32)
+
+    # the pixels of get_pixels, one Point at a time
+    def iter_pixels(self, chunk=CHUNK):
+        return iter_points(self.iter_pixel_arrays(chunk))
+
+    def control_points(self):
+        return [self.p, self.r_point]
+
+    # same circle (color) over new control points
+    def copy_with(self, points, mirrored=False):
+        return Circle(points[0], points[1], self.color)
+
+    # angle of r_point seen from the center, arcs measure their spans from it
+    def reference_angle(self):
+        return math.atan2(self.r_point.y - self.p.y, self.r_point.x - self.p.x)
+
+    # (xmin, ymin, xmax, ymax)
+    def bounds(self):
+        return (self.p.x - self.r, self.p.y - self.r, self.p.x + self.r, self.p.y + self.r)
+
+    # returns (xs, ys) int32 arrays
+    def bresenham_array(self):
+        ox, oy = patterns.get(("circle", self.r), lambda: circle_pattern(self.r))
+        return np.rint(self.p.x + ox).astype(np.int32), np.rint(self.p.y + oy).astype(np.int32)
+
+    # returns a Point array, kept in the shared rasters cache
     def bresenham(self):
-        x, y = 0, self.r
-        xc, yc = self.p.x, self.p.y
-        p = 3 - 2 * self.r
-        
-        self.plot_simetric(x, y, xc, yc)
-        
-        while x < y:
-            if p < 0:
-                p += 4 * x + 6
-            else:
-                p += 4 * (x - y) + 10
-                y-= 1
-            x += 1
-            self.plot_simetric(x, y, xc, yc)
-        
-        return self.circ
-        
-    def plot_simetric(self, x, y, xc, yc):
-        points = [
-            (xc + x, yc + y), (xc - x, yc + y),
-            (xc + x, yc - y), (xc - x, yc - y),
-            (xc + y, yc + x), (xc - y, yc + x),
-            (xc + y, yc - x), (xc - y, yc - x)
-        ]
-        for px, py in points:
-            self.circ.append(Point(px, py))
\ No newline at end of file
+        return rasters.get(self.raster_key("points"), lambda: (from_arrays(*self.bresenham_array()),))[0]
+
+    # the pixels of get_pixels as runs (rasterization.runs.Runs): the flat top and bottom
+    # give horizontal runs, the sides vertical ones
+    def runs(self):
+        return rasters.get(self.raster_key("runs"), lambda: (pixel_runs(*self.pixel_arrays()),))[0]
+
+    def raster_key(self, kind):
+        return ("circle", kind, self.p.x, self.p.y, self.r)
+
+    def invalidate(self):
+        for kind in ("points", "runs"):
+            rasters.discard(self.raster_key(kind))
+
+
+# angle of every pixel of a circle pattern
+def pattern_angles(r):
+    ox, oy = patterns.get(("circle", r), lambda: circle_pattern(r))
+    return np.arctan2(oy, ox)
+
+# part of a circle left by clipping: only the pixels whose angle falls inside one of the
+# spans are emitted. spans are (start, length) in radians, measured from reference_angle()
+# so they follow the circle when it is translated, rotated or scaled
+class Arc(Circle):
+    def __init__(self, p, r, color, spans):
+        super().__init__(p, r, color)
+        self.spans = spans
+
+    def __repr__(self):
+        return f"Arc: P({self.p.x},{self.p.y}), R({self.r}), Spans({len(self.spans)}), Color({self.color}))"
+
+    # the pixels also depend on where the spans start and on the spans
+    def raster_key(self, kind):
+        return ("arc", kind, self.p.x, self.p.y, self.r_point.x, self.r_point.y, tuple(self.spans))
+
+    # a mirrored circle runs the other way around
+    def copy_with(self, points, mirrored=False):
+        spans = self.spans
+        if mirrored:
+            spans = [((-start - length) % (2 * math.pi), length) for start, length in spans]
+        return Arc(points[0], points[1], self.color, spans)
+
+    # returns (xs, ys) int32 arrays
+    def bresenham_array(self):
+        ox, oy = patterns.get(("circle", self.r), lambda: circle_pattern(self.r))
+        theta, = patterns.get(("circle-angles", self.r), lambda: (pattern_angles(self.r),))
+        mask = self.on_arc(theta)
+        return np.rint(self.p.x + ox[mask]).astype(np.int32), np.rint(self.p.y + oy[mask]).astype(np.int32)
+
+    def iter_pixel_arrays(self, chunk=CHUNK):
+        for ox, oy in circle_chunks(self.r, chunk):
+            mask = self.on_arc(np.arctan2(oy, ox))
+            yield np.rint(self.p.x + ox[mask]).astype(np.int32), np.rint(self.p.y + oy[mask]).astype(np.int32)
+
+    # which of the pattern angles fall inside one of the spans
+    def on_arc(self, theta):
+        theta = (theta - self.reference_angle()) % (2 * math.pi)
+        mask = np.zeros(len(theta), dtype=bool)
+        for start, length in self.spans:
+            mask |= (theta - start) % (2 * math.pi) <= length
+        return mask
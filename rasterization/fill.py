@@ -0,0 +1,137 @@
+import math
+
+import numpy as np
+
+from point import CHUNK, Point, from_arrays, iter_points
+from rasterization.cache import patterns, rasters
+from rasterization.circle import Circle, circle_pattern
+from rasterization.runs import Runs, Spans
+
+# Scanline ---------------------------------------------------------------------------------------------------------------------
+# spans of a polygon (even-odd rule), a pixel is inside when its center is.
+# edges are bucketed by the first scanline they cross (the edge table); walking down the scanlines,
+# the active edge table holds the edges crossing the current one as [x, dx per scanline, last scanline],
+# sorted by x its crossings pair up into spans, then every x steps by its slope
+def polygon_spans(xs, ys):
+    table = {}
+    n = len(xs)
+    for i in range(n):
+        xa, ya, xb, yb = xs[i], ys[i], xs[(i + 1) % n], ys[(i + 1) % n]
+        if ya == yb: # horizontal edges add no crossing
+            continue
+        if ya > yb:
+            xa, ya, xb, yb = xb, yb, xa, ya
+        # scanlines ya <= y < yb
+        first, last = math.ceil(ya), math.ceil(yb) - 1
+        if first > last:
+            continue
+        slope = (xb - xa) / (yb - ya)
+        table.setdefault(first, []).append([xa + (first - ya) * slope, slope, last])
+
+    rows, starts, ends = [], [], []
+    if not table:
+        return Spans(rows, starts, ends)
+    active = []
+    y, y_max = min(table), max(table)
+    while active or y <= y_max:
+        active += table.get(y, [])
+        active = [e for e in active if e[2] >= y]
+        active.sort(key=lambda e: e[0])
+        for left, right in zip(active[::2], active[1::2]):
+            x0, x1 = math.ceil(left[0]), math.ceil(right[0]) - 1
+            if x0 <= x1:
+                rows.append(y)
+                starts.append(x0)
+                ends.append(x1)
+        for e in active:
+            e[0] += e[1]
+        y += 1
+    return Spans(rows, starts, ends)
+
+# span offsets of a disc from its center: each row of the Bresenham outline pattern is
+# filled from its leftmost to its rightmost pixel, so the fill meets the outline exactly
+def disc_pattern(r):
+    ox, oy = circle_pattern(r)
+    rows, inverse = np.unique(oy, return_inverse=True)
+    left = np.full(len(rows), np.inf)
+    right = np.full(len(rows), -np.inf)
+    np.minimum.at(left, inverse, ox)
+    np.maximum.at(right, inverse, ox)
+    return rows, left, right
+
+# Filled primitives ------------------------------------------------------------------------------------------------------------
+# drawn from spans(); the pixel methods expand them for the code that needs pixels
+class Filled:
+    # returns (xs, ys) int32 arrays
+    def pixel_arrays(self):
+        return self.spans().pixel_arrays()
+
+    # returns a Point array
+    def get_pixels(self):
+        return from_arrays(*self.pixel_arrays())
+
+    # the pixels of pixel_arrays, `chunk` spans at a time
+    def iter_pixel_arrays(self, chunk=CHUNK):
+        spans = self.spans()
+        for i in range(0, len(spans), chunk):
+            yield Spans(spans.ys[i:i + chunk], spans.x0s[i:i + chunk], spans.x1s[i:i + chunk]).pixel_arrays()
+
+    def iter_pixels(self, chunk=CHUNK):
+        return iter_points(self.iter_pixel_arrays(chunk))
+
+    def runs(self):
+        return Runs(self.spans())
+
+class FilledCircle(Filled, Circle):
+    def __repr__(self):
+        return f"FilledCircle: P({self.p.x},{self.p.y}), R({self.r}), Color({self.color}))"
+
+    def copy_with(self, points, mirrored=False):
+        return FilledCircle(points[0], points[1], self.color)
+
+    # one span per row, the offsets only depend on the radius and are shared through the pattern cache
+    def spans(self):
+        oy, left, right = patterns.get(("disc", self.r), lambda: disc_pattern(self.r))
+        cy = np.rint(self.p.y + oy)
+        return Spans(cy, np.rint(self.p.x + left), np.rint(self.p.x + right))
+
+    # a regular polygon close to the disc, segments of about `step` pixels
+    def to_polygon(self, step=2):
+        n = max(16, math.ceil(2 * math.pi * self.r / step))
+        a = self.reference_angle() + np.arange(n) * (2 * math.pi / n)
+        xs, ys = self.p.x + self.r * np.cos(a), self.p.y + self.r * np.sin(a)
+        return Polygon([Point(x, y) for x, y in zip(xs.tolist(), ys.tolist())], self.color)
+
+class Polygon(Filled):
+    # vertices in order, the last one connects back to the first
+    def __init__(self, points, color):
+        if len(points) < 3 or not all(isinstance(p, Point) for p in points):
+            raise TypeError("points must be at least 3 Point")
+        self.points = list(points)
+        self.color = color
+
+    def __repr__(self):
+        return f"Polygon: {len(self.points)} vertices, Color({self.color}))"
+
+    def control_points(self):
+        return list(self.points)
+
+    # same polygon (color) over new control points
+    def copy_with(self, points, mirrored=False):
+        return Polygon(points, self.color)
+
+    # (xmin, ymin, xmax, ymax)
+    def bounds(self):
+        xs = [p.x for p in self.points]
+        ys = [p.y for p in self.points]
+        return (min(xs), min(ys), max(xs), max(ys))
+
+    # kept in the shared rasters cache under the vertices
+    def spans(self):
+        return rasters.get(self.raster_key(), lambda: (polygon_spans([p.x for p in self.points], [p.y for p in self.points]),))[0]
+
+    def raster_key(self):
+        return ("polygon", tuple((p.x, p.y) for p in self.points))
+
+    def invalidate(self):
+        rasters.discard(self.raster_key())
@@ -1,11 +1,54 @@
-from point import Point
+import numpy as np
+
+from point import CHUNK, Point, from_arrays, iter_points, join
+from rasterization.cache import patterns, rasters
+from rasterization.runs import pixel_runs
+
+# pixel offsets of a DDA line from its first point, as floats (steps + 2 samples like the original loop),
+# yielded `chunk` samples at a time
+def dda_chunks(dx, dy, chunk=CHUNK):
+    steps = int(abs(dx)) if abs(dx) > abs(dy) else int(abs(dy))
+    if steps == 0:
+        yield np.zeros(1), np.zeros(1)
+        return
+    for start in range(0, steps + 2, chunk):
+        i = np.arange(start, min(start + chunk, steps + 2))
+        yield i * (dx / steps), i * (dy / steps)
+
+def dda_pattern(dx, dy):
+    return join(dda_chunks(dx, dy))
+
+# pixel offsets of a Bresenham line from its first point, the error term is solved for every step at once.
+# yielded `chunk` steps at a time. the error term grows with dx * dy, so it is computed in int64
+# (int32 overflows past dx * dy ~ 2^30, e.g. a line seen at a high zoom)
+def bresenham_chunks(dx, dy, chunk=CHUNK):
+    x_inc = 1 if dx >= 0 else -1
+    y_inc = 1 if dy >= 0 else -1
+    dx, dy = abs(dx), abs(dy)
+
+    if dy < dx:
+        for start in range(0, dx + 1, chunk):
+            k = np.arange(start, min(start + chunk, dx + 1), dtype=np.int64)
+            yield (x_inc * k).astype(np.int32), (y_inc * ((2 * dy * k + dx) // (2 * dx))).astype(np.int32)
+        return
+    if dy == 0:
+        yield np.zeros(1, dtype=np.int32), np.zeros(1, dtype=np.int32)
+        return
+    for start in range(0, dy + 1, chunk):
+        k = np.arange(start, min(start + chunk, dy + 1), dtype=np.int64)
+        yield (x_inc * ((2 * dx * k + dy) // (2 * dy))).astype(np.int32), (y_inc * k).astype(np.int32)
+
+def bresenham_pattern(dx, dy):
+    return join(bresenham_chunks(dx, dy))
 
 class Line:
-    def __init__(self, p1, p2, color):
+    # algorithm is "dda" or "bresenham", the one used by get_pixels
+    def __init__(self, p1, p2, color, algorithm="dda"):
         if isinstance(p1, Point) and isinstance(p2, Point):
             self.p1 = p1
             self.p2 = p2
             self.color = color
+            self.algorithm = algorithm
         else:
             raise TypeError("p1 and p2 must be Point type")
         
@@ -13,80 +56,71 @@ class Line:
         return f"Line: P1({self.p1.x},{self.p1.y}), P2({self.p2.x},{self.p2.y}, Color({self.color})))"
     
     def get_pixels(self):
-        return self.dda()
+        return self.bresenham() if self.algorithm == "bresenham" else self.dda()
+
+    # returns (xs, ys) int32 arrays
+    def pixel_arrays(self):
+        return self.bresenham_array() if self.algorithm == "bresenham" else self.dda_array()
+
+    # the pixels of pixel_arrays, in the same order, as (xs, ys) chunks computed only when they are
+    # asked for: a consumer that stops early never rasterizes the rest, memory doesn't grow with the length
+    def iter_pixel_arrays(self, chunk=CHUNK):
+        if self.algorithm == "bresenham":
+            x1, y1 = int(self.p1.x), int(self.p1.y)
+            for ox, oy in bresenham_chunks(int(self.p2.x) - x1, int(self.p2.y) - y1, chunk):
+                yield (x1 + ox).astype(np.int32), (y1 + oy).astype(np.int32)
+        else:
+            for ox, oy in dda_chunks(self.p2.x - self.p1.x, self.p2.y - self.p1.y, chunk):
+                yield np.rint(self.p1.x + ox).astype(np.int32), np.rint(self.p1.y + oy).astype(np.int32)
 
-    # returns a Point array
-    def dda(self):
-        line = []
+    # the pixels of get_pixels, one Point at a time
+    def iter_pixels(self, chunk=CHUNK):
+        return iter_points(self.iter_pixel_arrays(chunk))
 
-        x1, y1 = self.p1.x, self.p1.y
-        x2, y2 = self.p2.x, self.p2.y
+    def control_points(self):
+        return [self.p1, self.p2]
 
-        dx = x2 - x1
-        dy = y2 - y1
+    # same line (color) over new control points
+    def copy_with(self, points, mirrored=False):
+        return Line(points[0], points[1], self.color, self.algorithm)
 
-        steps = int(abs(dx)) if abs(dx) > abs(dy) else int(abs(dy))
+    # (xmin, ymin, xmax, ymax)
+    def bounds(self):
+        return (min(self.p1.x, self.p2.x), min(self.p1.y, self.p2.y), max(self.p1.x, self.p2.x), max(self.p1.y, self.p2.y))
 
-        x_inc = dx / steps
-        y_inc = dy / steps
+    # returns (xs, ys) int32 arrays
+    def dda_array(self):
+        dx, dy = self.p2.x - self.p1.x, self.p2.y - self.p1.y
+        ox, oy = patterns.get(("dda", dx, dy), lambda: dda_pattern(dx, dy))
+        return np.rint(self.p1.x + ox).astype(np.int32), np.rint(self.p1.y + oy).astype(np.int32)
 
-        x, y = x1, y1
-        line.append(Point(x,y)) 
+    # returns (xs, ys) int32 arrays
+    def bresenham_array(self):
+        x1, y1 = int(self.p1.x), int(self.p1.y)
+        x2, y2 = int(self.p2.x), int(self.p2.y)
+        dx, dy = x2 - x1, y2 - y1
+        ox, oy = patterns.get(("bresenham", dx, dy), lambda: bresenham_pattern(dx, dy))
+        return (x1 + ox).astype(np.int32), (y1 + oy).astype(np.int32)
+
+    # returns a Point array
+    def dda(self):
+        return self.cached("dda", lambda: from_arrays(*self.dda_array()))
 
-        for _ in range(steps + 1):
-            x += x_inc
-            y += y_inc
-            line.append(Point(x,y))
-        return line 
     # returns a Point array
     def bresenham(self):
-        line = []
+        return self.cached("bresenham", lambda: from_arrays(*self.bresenham_array()))
 
-        x1, y1 = int(self.p1.x), int(self.p1.y)
-        x2, y2 = int(self.p2.x), int(self.p2.y)
+    # the pixels of get_pixels as runs (rasterization.runs.Runs), one per horizontal/vertical stretch
+    def runs(self):
+        return self.cached(("runs", self.algorithm), lambda: pixel_runs(*self.pixel_arrays()))
 
-        dx = x2 - x1
-        dy = y2 - y1
+    # rasters are kept in the shared, bounded rasters cache under the endpoints they were made for
+    def cached(self, key, rasterize):
+        return rasters.get(self.raster_key(key), lambda: (rasterize(),))[0]
 
-        if dx >= 0:
-            x_inc = 1
-        else:
-            x_inc = -1
-            dx = -dx
+    def raster_key(self, key):
+        return ("line", key, self.p1.x, self.p1.y, self.p2.x, self.p2.y)
 
-        if dy >= 0:
-            y_inc = 1
-        else:
-            y_inc = -1
-            dy = -dy
-
-        x, y = x1, y1
-        line.append(Point(x,y))
-
-        if dy < dx:
-            p = 2 * dy - dx
-            const1 = 2 * dy
-            const2 = 2 * (dy - dx)
-
-            for _ in range(dx):
-                x += x_inc
-                if p < 0:
-                    p += const1
-                else:
-                    y += y_inc
-                    p += const2
-                line.append(Point(x,y))
-        else:
-            p = 2 * dx - dy
-            const1 = 2 * dx
-            const2 = 2 * (dx - dy)
-
-            for _ in range(dy):
-                y += y_inc
-                if p < 0:
-                    p += const1
-                else:
-                    x += x_inc
-                    p += const2
-                line.append(Point(x,y))
-        return line
\ No newline at end of file
+    def invalidate(self):
+        for key in ("dda", "bresenham", ("runs", "dda"), ("runs", "bresenham")):
+            rasters.discard(self.raster_key(key))
@@ -0,0 +1,136 @@
+import numpy as np
+
+from point import from_arrays
+
+# horizontal runs of pixels (y, x_start, x_end), x_end included, in three int32 arrays.
+# a filled shape is drawn one span at a time (a canvas line, a buffer row slice) instead of one pixel at a time
+class Spans:
+    __slots__ = ("ys", "x0s", "x1s")
+
+    def __init__(self, ys, x0s, x1s):
+        self.ys = np.asarray(ys, dtype=np.int32)
+        self.x0s = np.asarray(x0s, dtype=np.int32)
+        self.x1s = np.asarray(x1s, dtype=np.int32)
+
+    def __len__(self):
+        return len(self.ys)
+
+    def __iter__(self):
+        return zip(self.ys.tolist(), self.x0s.tolist(), self.x1s.tolist())
+
+    def __repr__(self):
+        return f"Spans({len(self)} spans)"
+
+    # (xmin, ymin, xmax, ymax), None when empty
+    def bounds(self):
+        if not len(self):
+            return None
+        return (int(self.x0s.min()), int(self.ys.min()), int(self.x1s.max()), int(self.ys.max()))
+
+    # the part inside (x1, y1, x2, y2), x2/y2 excluded
+    def clip(self, x1, y1, x2, y2):
+        x0s, x1s = np.maximum(self.x0s, x1), np.minimum(self.x1s, x2 - 1)
+        keep = (self.ys >= y1) & (self.ys < y2) & (x0s <= x1s)
+        return Spans(self.ys[keep], x0s[keep], x1s[keep])
+
+    # every pixel as (xs, ys) int32 arrays
+    def pixel_arrays(self):
+        lengths = self.x1s - self.x0s + 1
+        starts = np.repeat(self.x0s - np.cumsum(lengths) + lengths, lengths)
+        return (starts + np.arange(lengths.sum(), dtype=np.int32)).astype(np.int32), np.repeat(self.ys, lengths)
+
+    def points(self):
+        return from_arrays(*self.pixel_arrays())
+
+# pixels of an outline grouped in runs: horizontal runs of 2+ pixels, then vertical runs of 2+ among
+# the pixels left alone on their row, then the single pixels. a run is drawn with one canvas line or
+# one buffer slice write, the single pixels of a buffer in one numpy assignment
+class Runs:
+    __slots__ = ("rows", "columns", "xs", "ys")
+
+    # columns are transposed Spans: (x, y_start, y_end)
+    def __init__(self, rows, columns=None, xs=(), ys=()):
+        self.rows = rows
+        self.columns = columns if columns is not None else Spans((), (), ())
+        self.xs = np.asarray(xs, dtype=np.int32)
+        self.ys = np.asarray(ys, dtype=np.int32)
+
+    # number of draw operations
+    def __len__(self):
+        return len(self.rows) + len(self.columns) + len(self.xs)
+
+    def __repr__(self):
+        return f"Runs({len(self.rows)} rows, {len(self.columns)} columns, {len(self.xs)} pixels)"
+
+    # (xmin, ymin, xmax, ymax), None when empty
+    def bounds(self):
+        boxes = [self.rows.bounds()]
+        if len(self.columns):
+            y1, x1, y2, x2 = self.columns.bounds()
+            boxes.append((x1, y1, x2, y2))
+        if len(self.xs):
+            boxes.append((int(self.xs.min()), int(self.ys.min()), int(self.xs.max()), int(self.ys.max())))
+        boxes = [b for b in boxes if b is not None]
+        if not boxes:
+            return None
+        return (min(b[0] for b in boxes), min(b[1] for b in boxes), max(b[2] for b in boxes), max(b[3] for b in boxes))
+
+    # the part inside (x1, y1, x2, y2), x2/y2 excluded
+    def clip(self, x1, y1, x2, y2):
+        keep = (self.xs >= x1) & (self.xs < x2) & (self.ys >= y1) & (self.ys < y2)
+        return Runs(self.rows.clip(x1, y1, x2, y2), self.columns.clip(y1, x1, y2, x2), self.xs[keep], self.ys[keep])
+
+    # every pixel as (xs, ys) int32 arrays
+    def pixel_arrays(self):
+        rx, ry = self.rows.pixel_arrays()
+        cy, cx = self.columns.pixel_arrays()
+        return np.concatenate((rx, cx, self.xs)), np.concatenate((ry, cy, self.ys))
+
+    def points(self):
+        return from_arrays(*self.pixel_arrays())
+
+# which pixels of (xs, ys) are also pixels of (other_xs, other_ys), as a boolean array
+def pixels_in(xs, ys, other_xs, other_ys):
+    if not len(xs) or not len(other_xs):
+        return np.zeros(len(xs), dtype=bool)
+    xs, ys = np.asarray(xs, dtype=np.int64), np.asarray(ys, dtype=np.int64)
+    other_xs, other_ys = np.asarray(other_xs, dtype=np.int64), np.asarray(other_ys, dtype=np.int64)
+    # one int64 key per pixel over the bounds of both
+    x0, y0 = min(xs.min(), other_xs.min()), min(ys.min(), other_ys.min())
+    width = max(xs.max(), other_xs.max()) - x0 + 1
+    return np.isin((ys - y0) * width + (xs - x0), (other_ys - y0) * width + (other_xs - x0))
+
+# runs along b of pixels sorted by (a, b): (a, b_start, b_end) arrays and the length of the run of every pixel
+def collapse(a, b):
+    if not len(a):
+        return a, b, b, b
+    start = np.ones(len(a), dtype=bool)
+    start[1:] = (a[1:] != a[:-1]) | (b[1:] != b[:-1] + 1)
+    first = np.flatnonzero(start)
+    last = np.append(first[1:], len(a)) - 1
+    return a[first], b[first], b[last], np.repeat(last - first + 1, last - first + 1)
+
+# run-length output of a raster given as (xs, ys) arrays, duplicated pixels are dropped
+def pixel_runs(xs, ys):
+    if not len(xs):
+        return Runs(Spans((), (), ()))
+    # one int64 key per pixel, sorted by (y, x)
+    xs, ys = np.asarray(xs, dtype=np.int64), np.asarray(ys, dtype=np.int64)
+    x0, y0 = xs.min(), ys.min()
+    width = xs.max() - x0 + 1
+    keys = np.unique((ys - y0) * width + (xs - x0))
+    ys, xs = (keys // width + y0).astype(np.int32), (keys % width + x0).astype(np.int32)
+    row_y, row_x0, row_x1, lengths = collapse(ys, xs)
+    long = row_x1 > row_x0
+    rows = Spans(row_y[long], row_x0[long], row_x1[long])
+
+    # pixels alone on their row, sorted by (x, y)
+    alone = lengths == 1
+    xs, ys = xs[alone], ys[alone]
+    order = np.lexsort((ys, xs))
+    xs, ys = xs[order], ys[order]
+    col_x, col_y0, col_y1, lengths = collapse(xs, ys)
+    long = col_y1 > col_y0
+    columns = Spans(col_x[long], col_y0[long], col_y1[long])
+    single = lengths == 1
+    return Runs(rows, columns, xs[single], ys[single])
@@ -0,0 +1,28 @@
+from framebuffer import FrameBuffer
+from rasterization.fill import Filled
+
+# off-screen renderer: draws a Scene into a FrameBuffer without tkinter, so scenes can be
+# rendered, saved and compared on machines without a display
+class Renderer:
+    def __init__(self, width=800, height=600, bg="white"):
+        self.fb = FrameBuffer(width, height, bg)
+
+    # committed geometry of every line/circle and every free point
+    def render(self, scene, point_color="black"):
+        self.fb.fill()
+        self.draw_objects(self.fb, scene.all_objects())
+        self.fb.plot_points(scene.points, point_color)
+        self.fb.plot_points([p for p in scene.selected_points if p not in scene.owners], point_color)
+        return self.fb
+
+    # plot the objects over what is already in fb, in order. filled shapes are written span by span
+    def draw_objects(self, fb, objects):
+        for o in objects:
+            if isinstance(o, Filled):
+                fb.fill_spans(o.spans(), o.color)
+            else:
+                fb.plot_arrays(*o.pixel_arrays(), o.color)
+
+    # .png or .ppm
+    def save(self, path):
+        self.fb.save(path)
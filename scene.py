@@ -0,0 +1,292 @@
+from point import Point, PointSet
+from transformations import Affine
+from rasterization.line import Line
+from rasterization.circle import Circle
+from rasterization.fill import FilledCircle, Polygon
+from cutting import Cutting
+from spatial import GridIndex
+from graph import Group, Leaf
+
+# headless scene state: points, lines/circles, the selection, transformations and cuts.
+# nothing here draws; GraphicsApp drives it from the mouse and draws the result on a canvas,
+# renderer.Renderer draws it off-screen into a FrameBuffer
+class Scene:
+    def __init__(self):
+        # points and objects are dicts used as ordered sets, so removing a selection doesn't scan them.
+        # self.points maps each point to the order it was stored in
+        self.points = {}
+        self.point_count = 0
+        self.selected_points = []
+        # free points stored and taken since the last point_changes(), so they can be drawn incrementally
+        self.added_points = {}
+        self.removed_points = {}
+        self.objects = {} # store lines and circles points inside the canvas, each one -> the order it was stored in
+        self.object_count = 0
+        self.selected_objects = []
+
+        # grids over the unselected points and objects, used to find what is under the selector
+        self.point_index = GridIndex()
+        self.object_index = GridIndex()
+
+        # control point -> the line or circle it belongs to (selected or not)
+        self.owners = {}
+
+        # groups of objects moved as one: each one is a graph.Group under self.root, selected or not.
+        # a selected group is transformed by changing its node, its primitives are left alone
+        self.root = Group()
+        self.groups = {} # group -> the order it was stored in
+        self.group_count = 0
+        self.selected_groups = []
+        self.group_index = GridIndex()
+
+        # transform waiting to be applied to the selection, operations are folded into it
+        # and the geometry is only rebuilt and rasterized on commit
+        self.pending = Affine.identity()
+
+    def clear(self):
+        self.removed_points.update((p, None) for p in self.points if p not in self.added_points)
+        self.added_points.clear()
+        self.points.clear()
+        self.selected_points.clear()
+        self.objects.clear()
+        self.selected_objects.clear()
+        self.point_index.clear()
+        self.object_index.clear()
+        self.owners.clear()
+        self.root = Group()
+        self.groups.clear()
+        self.selected_groups.clear()
+        self.group_index.clear()
+        self.pending = Affine.identity()
+
+    # Points and objects ----------------------------------------------------------------------------------------------------------
+    def add_point(self, x, y):
+        point = Point(x, y)
+        self.store_point(point)
+        return point
+
+    # 1st point is the start of the line
+    def add_line(self, p1, p2, color, algorithm="dda"):
+        return self.add_object(Line(p1, p2, color, algorithm))
+
+    # 1st point is the center and the 2nd defines the radius length
+    def add_circle(self, p, r, color):
+        return self.add_object(Circle(p, r, color))
+
+    # same as a circle, drawn filled
+    def add_filled_circle(self, p, r, color):
+        return self.add_object(FilledCircle(p, r, color))
+
+    # filled polygon with the points as vertices, in order
+    def add_polygon(self, points, color):
+        return self.add_object(Polygon(points, color))
+
+    # (added, removed) free points since the last call
+    def point_changes(self):
+        changes = (list(self.added_points), list(self.removed_points))
+        self.added_points.clear()
+        self.removed_points.clear()
+        return changes
+
+    # the control points stop being free points (selected or not)
+    def add_object(self, o):
+        for p in o.control_points():
+            if p in self.points:
+                self.take_point(p)
+            if p in self.selected_points:
+                self.selected_points.remove(p)
+        self.store_object(o)
+        self.own(o)
+        return o
+
+    def store_point(self, p):
+        self.points[p] = self.point_count
+        self.point_count += 1
+        self.point_index.insert(p, (p.x, p.y, p.x, p.y))
+        if p in self.removed_points:
+            del self.removed_points[p]
+        else:
+            self.added_points[p] = None
+
+    def store_object(self, o):
+        self.objects[o] = self.object_count
+        self.object_count += 1
+        self.object_index.insert(o, o.bounds())
+
+    def own(self, o):
+        for p in o.control_points():
+            self.owners[p] = o
+
+    def disown(self, o):
+        for p in o.control_points():
+            if self.owners.get(p) is o:
+                del self.owners[p]
+
+    def take_point(self, p):
+        del self.points[p]
+        self.point_index.remove(p)
+        if p in self.added_points:
+            del self.added_points[p]
+        else:
+            self.removed_points[p] = None
+
+    def take_object(self, o):
+        del self.objects[o]
+        self.object_index.remove(o)
+
+    def store_group(self, g):
+        self.groups[g] = self.group_count
+        self.group_count += 1
+        self.group_index.insert(g, g.world_bounds())
+
+    def take_group(self, g):
+        del self.groups[g]
+        self.group_index.remove(g)
+
+    # every line and circle, selected or not, grouped ones in world coordinates
+    def all_objects(self):
+        grouped = [o for g in list(self.groups) + self.selected_groups for o in g.world_objects()]
+        return list(self.objects) + self.selected_objects + grouped
+
+    # lines and circles of the groups that overlap the rectangle (not selected)
+    def grouped_objects(self, x1, y1, x2, y2):
+        return [o for g in self.group_index.query(x1, y1, x2, y2) for o in g.world_objects((x1, y1, x2, y2))]
+
+    # selected lines and circles, grouped ones in world coordinates
+    def selection_objects(self):
+        return self.selected_objects + [o for g in self.selected_groups for o in g.world_objects()]
+
+    # Groups ----------------------------------------------------------------------------------------------------------------------
+    # the selected objects become one selected group, returns it (None if no object is selected)
+    def group_selection(self):
+        if not self.selected_objects:
+            return None
+        self.commit()
+        g = self.root.add(Group())
+        for o in self.selected_objects:
+            self.disown(o)
+            g.add(Leaf(o))
+        grouped = {p for o in self.selected_objects for p in o.control_points()}
+        self.selected_points = [p for p in self.selected_points if p not in grouped]
+        self.selected_objects.clear()
+        self.selected_groups.append(g)
+        return g
+
+    # the selected groups are dissolved, their objects (in world coordinates) stay selected
+    def ungroup_selection(self):
+        self.commit()
+        for g in self.selected_groups:
+            for o in g.world_objects():
+                self.selected_objects.append(o)
+                self.selected_points.extend(o.control_points())
+                self.own(o)
+            self.root.remove(g)
+        self.selected_groups.clear()
+
+    # Selection -------------------------------------------------------------------------------------------------------------------
+    def has_selection(self):
+        return bool(self.selected_points or self.selected_objects or self.selected_groups)
+
+    # move the points and objects inside the rectangle to the selection, only the ones whose
+    # bounds overlap it are tested. the grid gives them in no particular order, they are kept in
+    # the order they were stored so merging them back doesn't change the drawing order
+    def select(self, x1, y1, x2, y2):
+        window = Cutting([], Point(x1, y1), Point(x2, y2))
+        for o in sorted(self.object_index.query(x1, y1, x2, y2), key=self.objects.get):
+            if window.touches(o):
+                self.selected_objects.append(o)
+                self.take_object(o)
+
+        # a group is selected whole when one of its objects touches the window
+        for g in sorted(self.group_index.query(x1, y1, x2, y2), key=self.groups.get):
+            if any(window.touches(o) for o in g.world_objects((x1, y1, x2, y2))):
+                self.selected_groups.append(g)
+                self.take_group(g)
+
+        self.selected_points = sorted(self.point_index.query(x1, y1, x2, y2), key=self.points.get)
+        for p in self.selected_points:
+            self.take_point(p)
+
+        for o in self.selected_objects:
+            self.selected_points.extend(o.control_points())
+
+    # merge selected points into points list, the pending transform must be committed first
+    def merge_selection(self):
+        self.remove_selected_points_from_objects()
+        for p in self.selected_points:
+            self.store_point(p)
+        for o in self.selected_objects:
+            self.store_object(o)
+        for g in self.selected_groups:
+            self.store_group(g)
+        self.selected_objects.clear()
+        self.selected_groups.clear()
+        self.selected_points.clear()
+
+    # control points of lines and circles are not free points
+    def remove_selected_points_from_objects(self):
+        self.selected_points = [p for p in self.selected_points if p not in self.owners]
+
+    # takes object center as origin (where the pending transform puts it),
+    # a group counts as the center of its bounds
+    def selection_center(self):
+        points = [(p.x, p.y) for p in self.selected_points]
+        for g in self.selected_groups:
+            x1, y1, x2, y2 = g.world_bounds()
+            points.append(((x1 + x2) / 2, (y1 + y2) / 2))
+        ox = sum(x for x, _ in points) / len(points)
+        oy = sum(y for _, y in points) / len(points)
+        return self.pending.apply_point(ox, oy)
+
+    # Transformations -------------------------------------------------------------------------------------------------------------
+    # apply one affine transform to the free points and the control points of the selected
+    # objects in a single pass. points shared by several of them stay shared.
+    # selected groups only get the transform added to their node
+    def transform_selection(self, m):
+        points = dict.fromkeys(self.selected_points)
+        for o in self.selected_objects:
+            points.update(dict.fromkeys(o.control_points()))
+
+        moved = dict(zip(points, m.apply(PointSet.from_points(points))))
+
+        self.selected_points = [moved[p] for p in self.selected_points]
+        mirrored = m.determinant() < 0
+        new_objects = []
+        for o in self.selected_objects:
+            self.disown(o)
+            new_o = o.copy_with([moved[p] for p in o.control_points()], mirrored)
+            self.own(new_o)
+            new_objects.append(new_o)
+        self.selected_objects = new_objects
+
+        for g in self.selected_groups:
+            g.transform(m)
+
+    # fold an operation into the pending transform
+    def defer(self, m):
+        self.pending = self.pending.then(m)
+
+    # rebuild the selection with the pending transform, returns False if there was nothing to apply
+    def commit(self):
+        if self.pending.is_identity():
+            return False
+        self.transform_selection(self.pending)
+        self.pending = Affine.identity()
+        return True
+
+    # Cutting ---------------------------------------------------------------------------------------------------------------------
+    # clip every object to the window, free points are removed
+    def cut(self, xmin, ymin, xmax, ymax, algorithm="cohen"):
+        self.commit()
+        cut = Cutting(self.all_objects(), Point(xmin, ymin), Point(xmax, ymax))
+
+        if algorithm == "cohen":
+            new_objects = cut.cohen()
+        else:
+            new_objects = cut.liang()
+
+        self.clear()
+        for o in new_objects:
+            self.store_object(o)
+            self.own(o)
+        return new_objects
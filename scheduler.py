@@ -0,0 +1,36 @@
+# coalesces high rate events (mouse motion): only the latest call posted under each key runs,
+# once per frame, so the work done per second stays bounded when events come faster than redraws
+class FrameScheduler:
+    # interval in ms between frames, 0 runs the frame as soon as Tk is idle
+    def __init__(self, widget, interval=16):
+        self.widget = widget
+        self.interval = interval
+        self.pending = {} # key -> (fn, args), replaced by every new post
+        self.job = None
+
+    def post(self, key, fn, *args):
+        self.pending[key] = (fn, args)
+        if self.job is None:
+            if self.interval:
+                self.job = self.widget.after(self.interval, self.run)
+            else:
+                self.job = self.widget.after_idle(self.run)
+
+    def run(self):
+        self.job = None
+        pending, self.pending = self.pending, {}
+        for fn, args in pending.values():
+            fn(*args)
+
+    # apply whatever is pending right now (before a release/press reads the state)
+    def flush(self):
+        if self.job is not None:
+            self.widget.after_cancel(self.job)
+        self.run()
+
+    # drop what is pending without running it
+    def cancel(self):
+        if self.job is not None:
+            self.widget.after_cancel(self.job)
+            self.job = None
+        self.pending.clear()
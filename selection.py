@@ -4,12 +4,17 @@ class Selector:
     def __init__(self, canvas, x1, y1, x2, y2):
         self.outline = "hotpink"
         self.canvas = canvas
-        self.rect = self.canvas.create_rectangle(x1, y1, x2, y2, outline=self.outline, width=2)
+        # a polygon from the start, so rotating it only moves its corners
+        self.rect = self.canvas.create_polygon(self.corners(x1, y1, x2, y2), outline=self.outline, fill="", width=2)
         # x1 and y1 are min values
         # x2 and y2 are max values
         self.x1, self.y1, self.x2, self.y2 = x1, y1, x2, y2
         self.angle = 0
 
+    @staticmethod
+    def corners(x1, y1, x2, y2):
+        return [(x1, y1), (x2, y1), (x2, y2), (x1, y2)]
+
     def get_center(self):
         return (self.x1 + self.x2) / 2, (self.y1 + self.y2) / 2
     
@@ -28,7 +33,7 @@ class Selector:
         self.y2 += dy
 
     def update_position(self, x1, y1, x2, y2):
-        self.canvas.coords(self.rect, x1, y1, x2, y2)
+        self.canvas.coords(self.rect, *self.flat(self.corners(x1, y1, x2, y2)))
         self.x1, self.y1, self.x2, self.y2 = x1, y1, x2, y2
 
     # rotate the selector by angle in degrees
@@ -36,19 +41,13 @@ class Selector:
         self.angle += angle  # update total rotation
         cx, cy = self.get_center()
         
-        # get four corners of rectangle
-        corners = [
-            (self.x1, self.y1),
-            (self.x2, self.y1),
-            (self.x2, self.y2),
-            (self.x1, self.y2),
-        ]
-
-        # rotate all corners
-        rotated_corners = self.rotate_points(corners, angle, (cx, cy))
+        # rotate the four corners of the rectangle and move the existing item to them
+        rotated_corners = self.rotate_points(self.corners(self.x1, self.y1, self.x2, self.y2), angle, (cx, cy))
+        self.canvas.coords(self.rect, *self.flat(rotated_corners))
 
-        self.canvas.delete(self.rect)
-        self.rect = self.canvas.create_polygon(rotated_corners, outline=self.outline, fill="", width=2)
+    @staticmethod
+    def flat(points):
+        return [c for p in points for c in p]
 
     # aux function to rotate points around a origin
     def rotate_points(self, points, angle, origin):
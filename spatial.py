@@ -0,0 +1,79 @@
+from collections import defaultdict
+
+# uniform grid over axis-aligned boxes (x1, y1, x2, y2): every key is stored in each
+# cell its box covers, so a query only looks at keys near the queried rectangle.
+# boxes covering more than `max_cells` cells are kept apart in an overflow set tested on every
+# query, and a query larger than the occupied cells walks those instead, so neither inserting a huge
+# box nor querying a huge rectangle (the whole world zoomed out) costs more than what is stored
+class GridIndex:
+    def __init__(self, cell=64, max_cells=256):
+        self.cell = cell
+        self.max_cells = max_cells
+        self.cells = defaultdict(set) # (cx, cy) -> keys
+        self.boxes = {} # key -> box
+        self.overflow = {} # keys of the oversized boxes, an ordered set
+
+    def __len__(self):
+        return len(self.boxes)
+
+    def __contains__(self, key):
+        return key in self.boxes
+
+    # (cx1, cy1, cx2, cy2) cells covered by the box, included
+    def cell_bounds(self, x1, y1, x2, y2):
+        c = self.cell
+        return int(x1 // c), int(y1 // c), int(x2 // c), int(y2 // c)
+
+    def cell_count(self, x1, y1, x2, y2):
+        cx1, cy1, cx2, cy2 = self.cell_bounds(x1, y1, x2, y2)
+        return (cx2 - cx1 + 1) * (cy2 - cy1 + 1)
+
+    def cell_range(self, x1, y1, x2, y2):
+        cx1, cy1, cx2, cy2 = self.cell_bounds(x1, y1, x2, y2)
+        for cx in range(cx1, cx2 + 1):
+            for cy in range(cy1, cy2 + 1):
+                yield cx, cy
+
+    def insert(self, key, box):
+        if key in self.boxes:
+            self.remove(key)
+        self.boxes[key] = box
+        if self.cell_count(*box) > self.max_cells:
+            self.overflow[key] = None
+            return
+        for cell in self.cell_range(*box):
+            self.cells[cell].add(key)
+
+    def remove(self, key):
+        box = self.boxes.pop(key, None)
+        if box is None:
+            return
+        if key in self.overflow:
+            del self.overflow[key]
+            return
+        for cell in self.cell_range(*box):
+            keys = self.cells[cell]
+            keys.discard(key)
+            if not keys:
+                del self.cells[cell]
+
+    # keys whose box overlaps the rectangle
+    def query(self, x1, y1, x2, y2):
+        found = set(self.overflow)
+        if self.cell_count(x1, y1, x2, y2) <= len(self.cells):
+            for cell in self.cell_range(x1, y1, x2, y2):
+                keys = self.cells.get(cell)
+                if keys:
+                    found.update(keys)
+        else:
+            cx1, cy1, cx2, cy2 = self.cell_bounds(x1, y1, x2, y2)
+            for (cx, cy), keys in self.cells.items():
+                if cx1 <= cx <= cx2 and cy1 <= cy <= cy2:
+                    found.update(keys)
+        boxes = self.boxes
+        return [k for k in found if boxes[k][0] <= x2 and x1 <= boxes[k][2] and boxes[k][1] <= y2 and y1 <= boxes[k][3]]
+
+    def clear(self):
+        self.cells.clear()
+        self.boxes.clear()
+        self.overflow.clear()
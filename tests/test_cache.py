@@ -0,0 +1,35 @@
+import numpy as np
+
+from point import Point, from_arrays
+from rasterization.cache import PatternCache, nbytes
+from rasterization.circle import Circle
+from rasterization.runs import Spans
+
+# every kind of entry is charged in bytes: a span stands for many pixels but costs three ints,
+# a Point list costs far more per pixel than the arrays it was made from
+def test_entries_are_weighed_in_bytes():
+    xs, ys = np.arange(1000, dtype=np.int32), np.zeros(1000, dtype=np.int32)
+    assert nbytes((xs, ys)) >= 8000
+    assert nbytes((from_arrays(xs, ys),)) > 5 * nbytes((xs, ys))
+    wide = Spans([0], [0], [10 ** 6])
+    assert nbytes((wide,)) < 1000
+    circle = Circle(Point(400, 300), Point(600, 300), "black")
+    assert nbytes((circle.runs(),)) < nbytes((circle.bresenham(),))
+
+def test_evicts_least_recently_used_under_the_byte_budget():
+    size = nbytes((np.zeros(100, dtype=np.int64),))
+    cache = PatternCache(max_bytes=3 * size)
+    for key in "abc":
+        cache.get(key, lambda: (np.zeros(100, dtype=np.int64),))
+    cache.get("a", lambda: None) # a is used again, b is now the oldest
+    cache.get("d", lambda: (np.zeros(100, dtype=np.int64),))
+    assert list(cache.entries) == ["c", "a", "d"]
+    assert cache.bytes == 3 * size
+    cache.discard("a")
+    assert cache.bytes == 2 * size
+
+def test_entry_over_the_budget_is_not_kept():
+    cache = PatternCache(max_bytes=100)
+    value = (np.zeros(1000, dtype=np.int32),)
+    assert cache.get("big", lambda: value) is value
+    assert not cache.entries and cache.bytes == 0
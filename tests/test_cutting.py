@@ -0,0 +1,164 @@
+# the batch clippers against the per-segment run_cohen / run_liang, and circles clipped to arcs
+import math
+import random
+
+import numpy as np
+import pytest
+
+from cutting import Cutting, cohen_batch, intersect_spans, liang_batch
+from point import Point
+from rasterization.circle import Arc, Circle
+from transformations import Affine
+
+PMIN, PMAX = Point(200, 150), Point(600, 450)
+
+# random segments, a third of them parallel to an axis and a few of them a single point
+def segments(seed, n):
+    rng = random.Random(seed)
+    result = []
+    for _ in range(n):
+        x1, y1, x2, y2 = (rng.randint(-100, 900) for _ in range(4))
+        kind = rng.random()
+        if kind < 0.15:
+            x2 = x1
+        elif kind < 0.3:
+            y2 = y1
+        elif kind < 0.35:
+            x2, y2 = x1, y1
+        result.append((x1, y1, x2, y2))
+    return result
+
+def batch(clip, segs):
+    return clip(*(np.array(a, dtype=np.float64) for a in zip(*segs)), PMIN, PMAX)
+
+def parallel_outside(x1, y1, x2, y2):
+    return ((x1 == x2 and not PMIN.x <= x1 <= PMAX.x) or (y1 == y2 and not PMIN.y <= y1 <= PMAX.y))
+
+def assert_same(line, clipped):
+    assert line is not None
+    assert np.allclose((line.p1.x, line.p1.y, line.p2.x, line.p2.y), clipped)
+
+# Lines -------------------------------------------------------------------------------------------------------------------------
+@pytest.mark.parametrize("seed", range(3))
+def test_cohen_batch_matches_run_cohen(seed):
+    segs = segments(seed, 1000)
+    x1, y1, x2, y2, accept = batch(cohen_batch, segs)
+    cut = Cutting([], PMIN, PMAX)
+    for i, (a, b, c, d) in enumerate(segs):
+        line = cut.run_cohen(Point(a, b), Point(c, d), "black")
+        if accept[i]:
+            assert_same(line, (x1[i], y1[i], x2[i], y2[i]))
+        else:
+            assert line is None
+
+# run_liang's clip_test lets a segment parallel to an edge through even when it lies outside
+# that edge (a single point outside is parallel to all of them), the batch rejects it
+@pytest.mark.parametrize("seed", range(3))
+def test_liang_batch_matches_run_liang(seed):
+    segs = segments(seed, 1000)
+    x1, y1, x2, y2, accept = batch(liang_batch, segs)
+    cut = Cutting([], PMIN, PMAX)
+    for i, (a, b, c, d) in enumerate(segs):
+        line = cut.run_liang(Point(a, b), Point(c, d), "black")
+        if parallel_outside(a, b, c, d):
+            assert not accept[i]
+            assert not cut.line_touches(Point(a, b), Point(c, d))
+        elif accept[i]:
+            assert_same(line, (x1[i], y1[i], x2[i], y2[i]))
+        else:
+            assert line is None
+
+def test_batch_clippers_agree():
+    segs = segments(7, 2000)
+    cx1, cy1, cx2, cy2, caccept = batch(cohen_batch, segs)
+    lx1, ly1, lx2, ly2, laccept = batch(liang_batch, segs)
+    assert np.array_equal(caccept, laccept)
+    # both keep the direction of the segment
+    assert np.allclose(cx1[caccept], lx1[laccept]) and np.allclose(cy1[caccept], ly1[laccept])
+    assert np.allclose(cx2[caccept], lx2[laccept]) and np.allclose(cy2[caccept], ly2[laccept])
+
+@pytest.mark.parametrize("clip", [cohen_batch, liang_batch])
+def test_parallel_and_degenerate_segments(clip):
+    segs = [(100, 300, 700, 300), # horizontal across
+            (100, 100, 700, 100), # horizontal above
+            (400, 0, 400, 500), # vertical across
+            (100, 0, 100, 500), # vertical left of the window
+            (300, 300, 300, 300), # a point inside
+            (50, 50, 50, 50), # a point outside
+            (200, 100, 200, 500)] # on the left edge
+    x1, y1, x2, y2, accept = batch(clip, segs)
+    assert accept.tolist() == [True, False, True, False, True, False, True]
+    assert np.allclose([x1[0], y1[0], x2[0], y2[0]], [200, 300, 600, 300])
+    assert np.allclose([x1[2], y1[2], x2[2], y2[2]], [400, 150, 400, 450])
+    assert np.allclose([x1[4], y1[4], x2[4], y2[4]], [300, 300, 300, 300])
+    assert np.allclose([x1[6], y1[6], x2[6], y2[6]], [200, 150, 200, 450])
+
+@pytest.mark.parametrize("clip", [cohen_batch, liang_batch])
+def test_inputs_are_not_modified(clip):
+    xs = np.array([0.0, 300.0])
+    before = xs.copy()
+    clip(xs, np.array([0.0, 300.0]), np.array([800.0, 310.0]), np.array([600.0, 320.0]), PMIN, PMAX)
+    assert np.array_equal(xs, before)
+
+# Arcs --------------------------------------------------------------------------------------------------------------------------
+def on_circle(c, angle):
+    return Point(c.p.x + c.r * math.cos(angle), c.p.y + c.r * math.sin(angle))
+
+# points where the spans of an arc start and end, sorted
+def endpoints(arc):
+    ref = arc.reference_angle()
+    return sorted_points((on_circle(arc, ref + a).x, on_circle(arc, ref + a).y)
+                         for start, length in arc.spans for a in (start, start + length))
+
+def sorted_points(points):
+    return np.array(sorted(points, key=lambda p: (round(p[0], 3), round(p[1], 3))))
+
+def test_clip_circle_inside_outside_and_crossing():
+    cut = Cutting([], PMIN, PMAX)
+    inside = Circle(Point(400, 300), Point(450, 300), "black")
+    assert cut.clip_circle(inside) is inside
+    assert cut.clip_circle(Circle(Point(0, 0), Point(50, 0), "black")) is None
+    # the window is inside the circle
+    assert cut.clip_circle(Circle(Point(400, 300), Point(2000, 300), "black")) is None
+
+    circle = Circle(Point(200, 300), Point(300, 300), "black") # centered on the left edge
+    arc = cut.clip_circle(circle)
+    assert isinstance(arc, Arc)
+    assert sum(length for _, length in arc.spans) == pytest.approx(math.pi)
+    assert np.allclose(endpoints(arc), [(200, 200), (200, 400)])
+    xs, _ = arc.pixel_arrays()
+    assert xs.min() >= 199 and len(xs) < len(circle.pixel_arrays()[0])
+
+# the spans are measured from reference_angle(), so they follow r_point: the same arc
+# results whatever the control point on the circle is
+def test_arc_spans_follow_the_reference_angle():
+    cut = Cutting([], PMIN, PMAX)
+    a = cut.clip_circle(Circle(Point(200, 300), Point(300, 300), "black"))
+    b = cut.clip_circle(Circle(Point(200, 300), on_circle(a, 1.0), "black"))
+    assert b.reference_angle() == pytest.approx(1.0)
+    assert np.allclose(endpoints(a), endpoints(b))
+    assert np.array_equal(np.sort(a.pixel_arrays()[0]), np.sort(b.pixel_arrays()[0]))
+
+@pytest.mark.parametrize("m", [Affine.reflection("Y", (200, 0)), Affine.reflection("X", (0, 300)),
+                               Affine.reflection("XY", (100, 100)).then(Affine.rotation(30)),
+                               Affine.rotation(45, (200, 300))])
+def test_arc_under_transform(m):
+    cut = Cutting([], PMIN, PMAX)
+    arc = cut.clip_circle(Circle(Point(200, 300), Point(270, 370), "black"))
+    moved = arc.copy_with(m.apply(arc.control_points()), m.determinant() < 0)
+    cx, cy = m.apply_point(arc.p.x, arc.p.y)
+    # r_point moved with the circle, so does the reference angle
+    rx, ry = m.apply_point(arc.r_point.x, arc.r_point.y)
+    assert moved.reference_angle() == pytest.approx(math.atan2(ry - cy, rx - cx))
+    # the ends of the spans are the moved ends
+    assert np.allclose(endpoints(moved), sorted_points(m.apply_point(x, y) for x, y in endpoints(arc)))
+    # the middle of the span is still on the arc and the middle of the gap still off it
+    (start, length), = arc.spans
+    for angle, on in ((start + length / 2, True), (start + length + (2 * math.pi - length) / 2, False)):
+        p = on_circle(arc, arc.reference_angle() + angle)
+        x, y = m.apply_point(p.x, p.y)
+        assert moved.on_arc(np.array([math.atan2(y - cy, x - cx)]))[0] == on
+
+def test_intersect_spans_across_zero():
+    assert intersect_spans([(3 * math.pi / 2, math.pi)], [(0, math.pi / 4)]) == [(0, math.pi / 4)]
+    assert intersect_spans([(0, 1)], [(2, 1)]) == []
@@ -0,0 +1,47 @@
+from graph import Group, Leaf
+from point import Point
+from rasterization.circle import Circle
+from rasterization.line import Line
+from scene import Scene
+from transformations import Affine
+
+# world_object() keeps a circle a circle under a non-uniform scale (radius |M (r_point - p)|),
+# the bounds must be the ones of that circle, not the mapped corners of the local bounds
+def test_non_uniformly_scaled_circle_bounds():
+    root = Group()
+    g = root.add(Group())
+    leaf = g.add(Leaf(Circle(Point(0, 0), Point(10, 0), "black")))
+    g.transform(Affine.scaling(10, 0.1))
+    assert leaf.world_object().r == 100
+    assert leaf.world_bounds() == (-100, -100, 100, 100)
+    assert g.world_bounds() == (-100, -100, 100, 100)
+    assert root.world_bounds() == (-100, -100, 100, 100)
+
+def test_scaled_grouped_circle_is_found():
+    scene = Scene()
+    scene.add_circle(Point(0, 0), Point(10, 0), "black")
+    scene.select(-20, -20, 20, 20)
+    g = scene.group_selection()
+    scene.transform_selection(Affine.scaling(10, 0.1))
+    scene.merge_selection()
+    # a rectangle on the top of the scaled circle, far outside the mapped local bounds
+    assert [o.r for o in scene.grouped_objects(-10, -105, 10, -95)] == [100]
+    scene.select(-10, -105, 10, -95)
+    assert scene.selected_groups == [g]
+
+# bounds follow a change of the node, of an ancestor and of the children
+def test_bounds_follow_changes():
+    root = Group()
+    outer = root.add(Group())
+    inner = outer.add(Group())
+    inner.add(Leaf(Line(Point(0, 0), Point(10, 5), "black")))
+    assert root.world_bounds() == (0, 0, 10, 5)
+    outer.transform(Affine.translation(100, 0))
+    assert inner.world_bounds() == (100, 0, 110, 5)
+    assert root.world_bounds() == (100, 0, 110, 5)
+    inner.add(Leaf(Line(Point(-5, -5), Point(0, 0), "black")))
+    assert root.world_bounds() == (95, -5, 110, 5)
+    inner.transform(Affine.scaling(2, 2))
+    assert root.world_bounds() == (90, -10, 120, 10)
+    outer.remove(inner)
+    assert root.world_bounds() is None
@@ -0,0 +1,168 @@
+# the vectorized rasterizers against the per-pixel loops they replaced. the loops gave float
+# points that were rounded when plotted, the rasterizers give the rounded pixels directly
+import math
+import random
+
+import numpy as np
+import pytest
+
+from point import CHUNK, Point
+from rasterization.line import Line, bresenham_chunks, bresenham_pattern, dda_chunks, dda_pattern
+from rasterization.circle import Circle, circle_chunks, circle_pattern
+
+# Reference loops -------------------------------------------------------------------------------------------------------------
+def loop_dda(x1, y1, x2, y2):
+    dx, dy = x2 - x1, y2 - y1
+    steps = int(abs(dx)) if abs(dx) > abs(dy) else int(abs(dy))
+    x_inc, y_inc = dx / steps, dy / steps
+    x, y = x1, y1
+    line = [(x, y)]
+    for _ in range(steps + 1):
+        x += x_inc
+        y += y_inc
+        line.append((x, y))
+    return line
+
+def loop_bresenham(x1, y1, x2, y2):
+    x1, y1, x2, y2 = int(x1), int(y1), int(x2), int(y2)
+    dx, dy = x2 - x1, y2 - y1
+    x_inc = 1 if dx >= 0 else -1
+    y_inc = 1 if dy >= 0 else -1
+    dx, dy = abs(dx), abs(dy)
+    x, y = x1, y1
+    line = [(x, y)]
+    if dy < dx:
+        p = 2 * dy - dx
+        for _ in range(dx):
+            x += x_inc
+            if p < 0:
+                p += 2 * dy
+            else:
+                y += y_inc
+                p += 2 * (dy - dx)
+            line.append((x, y))
+    else:
+        p = 2 * dx - dy
+        for _ in range(dy):
+            y += y_inc
+            if p < 0:
+                p += 2 * dx
+            else:
+                x += x_inc
+                p += 2 * (dx - dy)
+            line.append((x, y))
+    return line
+
+def loop_circle(xc, yc, r):
+    circ = []
+    def plot_simetric(x, y):
+        circ.extend([(xc + x, yc + y), (xc - x, yc + y), (xc + x, yc - y), (xc - x, yc - y),
+                     (xc + y, yc + x), (xc - y, yc + x), (xc + y, yc - x), (xc - y, yc - x)])
+    x, y = 0, r
+    p = 3 - 2 * r
+    plot_simetric(x, y)
+    while x < y:
+        if p < 0:
+            p += 4 * x + 6
+        else:
+            p += 4 * (x - y) + 10
+            y -= 1
+        x += 1
+        plot_simetric(x, y)
+    return circ
+
+def rounded(points):
+    return [(round(x), round(y)) for x, y in points]
+
+def pixels(points):
+    return [(p.x, p.y) for p in points]
+
+def random_segments(seed, n, coords):
+    rng = random.Random(seed)
+    return [tuple(coords(rng) for _ in range(4)) for _ in range(n)]
+
+integer = lambda rng: rng.randint(-50, 850)
+floating = lambda rng: rng.uniform(-50, 850)
+
+# Lines -----------------------------------------------------------------------------------------------------------------------
+@pytest.mark.parametrize("coords", [integer, floating])
+def test_bresenham_matches_loop(coords):
+    for x1, y1, x2, y2 in random_segments(1, 500, coords):
+        line = Line(Point(x1, y1), Point(x2, y2), "black")
+        assert pixels(line.bresenham()) == loop_bresenham(x1, y1, x2, y2)
+
+# DDA samples k * (d / steps) at once while the loop accumulated d / steps: when the exact sample is
+# a half pixel the accumulated float error could land on either side, so the rounded pixel may differ.
+# everywhere else they match
+@pytest.mark.parametrize("coords", [integer, floating])
+def test_dda_matches_loop_except_half_pixel_ties(coords):
+    for x1, y1, x2, y2 in random_segments(2, 500, coords):
+        if int(max(abs(x2 - x1), abs(y2 - y1))) == 0:
+            continue
+        line = Line(Point(x1, y1), Point(x2, y2), "black")
+        steps = int(max(abs(x2 - x1), abs(y2 - y1)))
+        for k, (old, new) in enumerate(zip(rounded(loop_dda(x1, y1, x2, y2)), pixels(line.dda()))):
+            if old != new:
+                exact = (x1 + k * ((x2 - x1) / steps), y1 + k * ((y2 - y1) / steps))
+                assert any(abs(v - math.floor(v) - 0.5) < 1e-6 for v in exact)
+
+def test_dda_half_pixel_ties_are_a_minority():
+    segments = [s for s in random_segments(3, 2000, integer) if (s[0], s[1]) != (s[2], s[3])]
+    differ = sum(rounded(loop_dda(*s)) != pixels(Line(Point(s[0], s[1]), Point(s[2], s[3]), "black").dda())
+                 for s in segments)
+    assert 0 < differ < 0.3 * len(segments)
+
+# (0, 0) -> (14, 3): the 7th sample is exactly y = 1.5, the loop accumulated 1.4999999999999998 (pixel 1),
+# 7 * (3 / 14) is 1.5 and rint rounds the tie to even (pixel 2)
+def test_dda_tie_example():
+    assert loop_dda(0, 0, 14, 3)[7] == (7.0, 1.4999999999999998)
+    assert rounded(loop_dda(0, 0, 14, 3))[7] == (7, 1)
+    assert pixels(Line(Point(0, 0), Point(14, 3), "black").dda())[7] == (7, 2)
+
+@pytest.mark.parametrize("algorithm", ["dda", "bresenham"])
+def test_zero_length_line(algorithm):
+    line = Line(Point(12, 34), Point(12, 34), "black")
+    assert pixels(getattr(line, algorithm)()) == [(12, 34)]
+
+# far past the int32 range of dx * dy (a line seen at a high zoom)
+def test_bresenham_long_line_does_not_overflow():
+    xs, ys = Line(Point(0, 0), Point(44800, 37760), "black").bresenham_array()
+    assert (xs[-1], ys[-1]) == (44800, 37760)
+    assert ys.min() == 0 and np.all(np.diff(ys) >= 0)
+
+@pytest.mark.parametrize("steps", [CHUNK - 2, CHUNK - 1, CHUNK, CHUNK + 1, 3 * CHUNK + 5])
+def test_line_chunks_join_to_the_pattern(steps):
+    for dx, dy in ((steps, steps // 3), (-steps // 5, steps)):
+        for chunks, pattern in ((dda_chunks(dx, dy), dda_pattern(dx, dy)), (bresenham_chunks(dx, dy), bresenham_pattern(dx, dy))):
+            chunks = list(chunks)
+            assert all(len(xs) <= CHUNK for xs, _ in chunks)
+            assert np.array_equal(np.concatenate([xs for xs, _ in chunks]), pattern[0])
+            assert np.array_equal(np.concatenate([ys for _, ys in chunks]), pattern[1])
+
+def test_line_iterators_match_lists():
+    for algorithm in ("dda", "bresenham"):
+        line = Line(Point(3, 7), Point(9000.5, 1234.25), "black", algorithm)
+        assert pixels(line.iter_pixels()) == pixels(line.get_pixels())
+
+# Circles ---------------------------------------------------------------------------------------------------------------------
+@pytest.mark.parametrize("seed", range(3))
+def test_circle_matches_loop(seed):
+    rng = random.Random(seed)
+    for _ in range(300):
+        xc, yc = rng.choice([(rng.randint(0, 800), rng.randint(0, 600)), (rng.uniform(0, 800), rng.uniform(0, 600))])
+        r_point = rng.choice([Point(xc + rng.randint(0, 300), yc), Point(xc + rng.uniform(-300, 300), yc + rng.uniform(-300, 300))])
+        circle = Circle(Point(xc, yc), r_point, "black")
+        assert pixels(circle.bresenham()) == rounded(loop_circle(xc, yc, circle.r))
+
+# the octant of radius r takes about r / sqrt(2) steps, these radii end it just before, on and just after
+# the first chunk boundary (plus a few tiny ones)
+@pytest.mark.parametrize("r", [math.floor(CHUNK * math.sqrt(2)) + d for d in range(-5, 6)] + [0, 0.4, 1, 2.5, 5791.3])
+def test_circle_around_chunk_boundary(r):
+    circle = Circle(Point(0, 0), Point(r, 0), "black")
+    assert pixels(circle.bresenham()) == rounded(loop_circle(0, 0, circle.r))
+    for chunk in (1, 7, CHUNK):
+        ox, oy = zip(*circle_chunks(r, chunk))
+        expected = circle_pattern(r)
+        assert np.array_equal(np.concatenate(ox), expected[0])
+        assert np.array_equal(np.concatenate(oy), expected[1])
+    assert pixels(circle.iter_pixels()) == pixels(circle.get_pixels())
@@ -0,0 +1,86 @@
+import random
+
+from point import Point
+from rasterization.line import Line
+from scene import Scene
+from transformations import Affine
+
+def coords(o):
+    return [(p.x, p.y) for p in o.control_points()]
+
+def random_scene(seed, n):
+    rng = random.Random(seed)
+    scene = Scene()
+    for _ in range(n):
+        p1, p2 = (Point(rng.uniform(0, 800), rng.uniform(0, 600)) for _ in range(2))
+        if rng.random() < 0.5:
+            scene.add_line(p1, p2, "black")
+        else:
+            scene.add_circle(p1, Point(p1.x + rng.uniform(1, 40), p1.y), "black")
+        scene.add_point(rng.uniform(0, 800), rng.uniform(0, 600))
+    return scene
+
+# the grid gives its keys in no particular order, the selection keeps the stored one
+def test_select_keeps_the_stored_order():
+    scene = random_scene(0, 300)
+    objects, points = list(scene.objects), list(scene.points)
+    scene.select(100, 100, 700, 500)
+    assert scene.selected_objects == [o for o in objects if o in scene.selected_objects]
+    free = [p for p in scene.selected_points if p not in scene.owners]
+    assert free == [p for p in points if p in free]
+    assert len(scene.selected_objects) > 10 and len(free) > 10
+
+def test_select_moves_what_touches_the_window():
+    scene = Scene()
+    inside = scene.add_line(Point(10, 10), Point(20, 20), "black")
+    crossing = scene.add_line(Point(0, 50), Point(100, 50), "black")
+    outside = scene.add_line(Point(200, 200), Point(300, 300), "black")
+    p = scene.add_point(15, 40)
+    scene.select(5, 5, 50, 60)
+    assert scene.selected_objects == [inside, crossing]
+    assert list(scene.objects) == [outside]
+    assert p in scene.selected_points and p not in scene.points
+
+# a transform and its inverse bring everything back, the order included
+def test_commit_and_merge_round_trip():
+    scene = random_scene(1, 200)
+    before = [coords(o) for o in scene.objects]
+    points = [(p.x, p.y) for p in scene.points]
+    m = Affine.rotation(30, (400, 300)).then(Affine.scaling(2, 0.5)).then(Affine.translation(10, -20))
+    inverse = Affine.translation(-10, 20).then(Affine.scaling(0.5, 2)).then(Affine.rotation(-30, (400, 300)))
+    for t in (m, inverse):
+        scene.select(-10000, -10000, 10000, 10000)
+        scene.defer(t)
+        assert scene.commit()
+        scene.merge_selection()
+        assert not scene.has_selection()
+    after = [coords(o) for o in scene.objects]
+    assert len(after) == len(before)
+    for a, b in zip(after, before):
+        for (x1, y1), (x2, y2) in zip(a, b):
+            assert abs(x1 - x2) < 1e-6 and abs(y1 - y2) < 1e-6
+    assert all(abs(x1 - x2) < 1e-6 and abs(y1 - y2) < 1e-6
+               for (x1, y1), (x2, y2) in zip(sorted((p.x, p.y) for p in scene.points), sorted(points)))
+    assert len(scene.object_index) == len(scene.objects) and len(scene.point_index) == len(scene.points)
+
+def test_commit_without_a_pending_transform_does_nothing():
+    scene = random_scene(2, 10)
+    scene.select(0, 0, 800, 600)
+    selected = list(scene.selected_objects)
+    assert not scene.commit()
+    assert scene.selected_objects == selected
+
+# a point shared by two objects is moved once and stays shared
+def test_shared_control_points_stay_shared():
+    scene = Scene()
+    shared = Point(10, 10)
+    a = scene.add_object(Line(Point(0, 0), shared, "black"))
+    b = scene.add_object(Line(shared, Point(20, 0), "black"))
+    scene.select(-1, -1, 21, 11)
+    scene.defer(Affine.translation(5, 5))
+    scene.commit()
+    a, b = scene.selected_objects
+    assert a.p2 is b.p1 and (a.p2.x, a.p2.y) == (15, 15)
+    assert scene.owners[a.p1] is a and scene.owners[b.p2] is b
+    scene.merge_selection()
+    assert set(scene.objects) == {a, b}
@@ -0,0 +1,60 @@
+import random
+
+from spatial import GridIndex
+
+def brute_force(boxes, x1, y1, x2, y2):
+    return {k for k, b in boxes.items() if b[0] <= x2 and x1 <= b[2] and b[1] <= y2 and y1 <= b[3]}
+
+def test_insert_query_remove():
+    grid = GridIndex(cell=10)
+    grid.insert("a", (0, 0, 5, 5))
+    grid.insert("b", (20, 20, 35, 25))
+    grid.insert("p", (50, 50, 50, 50)) # a point
+    assert len(grid) == 3 and "a" in grid
+    assert set(grid.query(0, 0, 100, 100)) == {"a", "b", "p"}
+    assert grid.query(6, 6, 19, 19) == [] # same cells as a and b, but outside both boxes
+    assert grid.query(50, 50, 50, 50) == ["p"]
+    grid.remove("b")
+    assert "b" not in grid and set(grid.query(0, 0, 100, 100)) == {"a", "p"}
+    assert not any("b" in keys for keys in grid.cells.values())
+    grid.remove("b") # removing twice does nothing
+    # inserting again moves the key
+    grid.insert("a", (90, 90, 95, 95))
+    assert grid.query(0, 0, 5, 5) == [] and grid.query(90, 90, 90, 90) == ["a"]
+
+# a box over max_cells is kept in the overflow set, not in the cells
+def test_oversized_boxes_go_to_overflow():
+    grid = GridIndex(cell=10, max_cells=4)
+    grid.insert("small", (0, 0, 15, 15)) # 4 cells
+    grid.insert("big", (0, 0, 1000, 1000))
+    assert "big" in grid.overflow and "small" not in grid.overflow
+    assert not any("big" in keys for keys in grid.cells.values())
+    assert set(grid.query(500, 500, 510, 510)) == {"big"}
+    assert set(grid.query(5, 5, 5, 5)) == {"small", "big"}
+    assert grid.query(2000, 2000, 2010, 2010) == [] # the overflow keys are still tested against their box
+    grid.remove("big")
+    assert not grid.overflow and grid.query(500, 500, 510, 510) == []
+    grid.insert("small", (0, 0, 500, 500)) # grows past max_cells
+    assert "small" in grid.overflow and not grid.cells
+    grid.clear()
+    assert len(grid) == 0 and not grid.overflow and not grid.cells
+
+# queries larger than the occupied cells walk those instead, the result is the same
+def test_queries_match_brute_force():
+    rng = random.Random(0)
+    grid = GridIndex(cell=16, max_cells=64)
+    boxes = {}
+    for i in range(500):
+        x, y = rng.uniform(-500, 500), rng.uniform(-500, 500)
+        w, h = rng.choice([(0, 0), (rng.uniform(0, 50), rng.uniform(0, 50)), (rng.uniform(0, 400), rng.uniform(0, 400))])
+        boxes[i] = (x, y, x + w, y + h)
+        grid.insert(i, boxes[i])
+    for i in range(0, 500, 3):
+        grid.remove(i)
+        del boxes[i]
+    assert grid.overflow
+    for _ in range(200):
+        x, y = rng.uniform(-600, 600), rng.uniform(-600, 600)
+        size = rng.choice([1, 30, 300, 10000])
+        rect = (x, y, x + size, y + size)
+        assert set(grid.query(*rect)) == brute_force(boxes, *rect)
@@ -1,67 +1,112 @@
 # 2D geometric transformations
 import math
 
-from point import Point
+import numpy as np
+
+from point import Point, PointSet, from_arrays
+
+# 3x3 affine matrix in homogeneous coordinates, stored as its first two rows:
+#   x' = a*x + b*y + c
+#   y' = d*x + e*y + f
+# `m1 @ m2` is the transform that applies m2 first and then m1
+class Affine:
+    __slots__ = ("a", "b", "c", "d", "e", "f")
+
+    def __init__(self, a=1.0, b=0.0, c=0.0, d=0.0, e=1.0, f=0.0):
+        self.a, self.b, self.c = a, b, c
+        self.d, self.e, self.f = d, e, f
+
+    def __repr__(self):
+        return f"Affine({self.a}, {self.b}, {self.c}, {self.d}, {self.e}, {self.f})"
+
+    def __eq__(self, other):
+        return isinstance(other, Affine) and self.coefficients() == other.coefficients()
+
+    def __matmul__(self, other):
+        return Affine(
+            self.a * other.a + self.b * other.d, self.a * other.b + self.b * other.e, self.a * other.c + self.b * other.f + self.c,
+            self.d * other.a + self.e * other.d, self.d * other.b + self.e * other.e, self.d * other.c + self.e * other.f + self.f,
+        )
+
+    # `m1.then(m2)` applies m1 first and then m2
+    def then(self, other):
+        return other @ self
+
+    @classmethod
+    def identity(cls):
+        return cls()
+
+    @classmethod
+    def translation(cls, dx, dy):
+        return cls(1, 0, dx, 0, 1, dy)
+
+    @classmethod
+    def rotation(cls, angle, origin=(0, 0)):
+        angle_rad = math.radians(angle)  # convert to radians
+        cos_angle = math.cos(angle_rad)
+        sin_angle = math.sin(angle_rad)
+        ox, oy = origin
+        return cls(cos_angle, -sin_angle, ox - cos_angle * ox + sin_angle * oy,
+                   sin_angle, cos_angle, oy - sin_angle * ox - cos_angle * oy)
+
+    @classmethod
+    def scaling(cls, sx, sy, origin=(0, 0)):
+        ox, oy = origin
+        return cls(sx, 0, ox - sx * ox, 0, sy, oy - sy * oy)
+
+    @classmethod
+    def reflection(cls, axis, center=(0, 0)):
+        cx, cy = center
+        if axis == 'X':
+            return cls(1, 0, 0, 0, -1, 2*cy)
+        elif axis == 'Y':
+            return cls(-1, 0, 2*cx, 0, 1, 0)
+        elif axis == 'XY':
+            return cls(-1, 0, 2*cx, 0, -1, 2*cy)
+        raise ValueError("Invalid axis! Choose 'X', 'Y' or 'XY'.")
+
+    def coefficients(self):
+        return (self.a, self.b, self.c, self.d, self.e, self.f)
+
+    def is_identity(self):
+        return self.coefficients() == (1, 0, 0, 0, 1, 0)
+
+    # negative when the transform mirrors the plane
+    def determinant(self):
+        return self.a * self.e - self.b * self.d
+
+    def apply_point(self, x, y):
+        return self.a * x + self.b * y + self.c, self.d * x + self.e * y + self.f
+
+    # transform coordinate arrays in one pass
+    def apply_arrays(self, xs, ys):
+        return self.a * xs + self.b * ys + self.c, self.d * xs + self.e * ys + self.f
+
+    # returns a PointSet when given one, a new Point list otherwise
+    def apply(self, points):
+        if isinstance(points, PointSet):
+            return PointSet.from_arrays(*self.apply_arrays(*points.arrays()))
+        xs = np.fromiter((p.x for p in points), dtype=np.float64)
+        ys = np.fromiter((p.y for p in points), dtype=np.float64)
+        return from_arrays(*self.apply_arrays(xs, ys))
 
 class Transformations:
-    # self.points should always be `Point` type
+    # self.points should always be `Point` type or a PointSet.
+    # every method returns a PointSet when given one, a new Point list otherwise
     def __init__(self, p):
-        if isinstance(p, list) and all(isinstance(point, Point) for point in p):
+        if isinstance(p, PointSet) or isinstance(p, list) and all(isinstance(point, Point) for point in p):
             self.points = p
         else:
             raise TypeError("Value must be a list of Point objects")
 
     def translate(self, points, dx, dy):
-        translated_points = []
-        for p in points:
-            new_point = Point(p.x + dx, p.y + dy)
-            translated_points.append(new_point)
-        return translated_points
+        return Affine.translation(dx, dy).apply(points)
 
     def rotate(self, points, angle, origin=(0, 0)):
-        angle_rad = math.radians(angle)  # convert to radians
-        cos_angle = math.cos(angle_rad)
-        sin_angle = math.sin(angle_rad)
-        
-        rotated_points = []
-        ox, oy = origin
-        
-        for p in points:
-            x = p.x
-            y = p.y
-            new_x = ox + cos_angle * (x - ox) - sin_angle * (y - oy)
-            new_y = oy + sin_angle * (x - ox) + cos_angle * (y - oy)
-            rotated_points.append(Point(new_x, new_y))
-        return rotated_points
+        return Affine.rotation(angle, origin).apply(points)
 
     def scale(self, points, sx, sy, origin=(0, 0)):
-        scaled_points = []
-        ox, oy = origin
-        
-        for p in points:
-            x = p.x
-            y = p.y
-            new_x = ox + sx * (x - ox)
-            new_y = oy + sy * (y - oy)
-            scaled_points.append(Point(new_x, new_y))
-        return scaled_points
+        return Affine.scaling(sx, sy, origin).apply(points)
 
     def reflect(self, points, axis, center=(0, 0)):
-        reflected_points = []
-        
-        cx, cy = center
-        
-        for p in points:
-            x = p.x
-            y = p.y
-            
-            if axis == 'X':  
-                reflected_points.append(Point(x, 2*cy - y))
-            elif axis == 'Y':  
-                reflected_points.append(Point(2*cx - x, y))
-            elif axis == 'XY':  
-                reflected_points.append(Point(2*cx - x, 2*cy - y))
-            else:
-                raise ValueError("Invalid axis! Choose 'X', 'Y' or 'XY'.")
-        return reflected_points
-
+        return Affine.reflection(axis, center).apply(points)
@@ -0,0 +1,106 @@
+import weakref
+
+import numpy as np
+
+from cutting import Cutting, liang_batch
+from point import Point
+from rasterization.circle import Circle
+from rasterization.fill import FilledCircle
+from rasterization.line import Line
+from transformations import Affine
+
+# world -> screen mapping of the canvas: screen = (world - origin) * zoom.
+# the scene stays in world coordinates, only what is drawn goes through the viewport
+class Viewport:
+    def __init__(self, width=800, height=600, zoom_range=(1 / 64, 64)):
+        self.width = width
+        self.height = height
+        self.zoom_range = zoom_range
+        self.zoom = 1.0
+        self.ox = 0.0 # world point at the top left corner of the screen
+        self.oy = 0.0
+        # object -> the same object in screen coordinates, valid until the view changes.
+        # zoomed out the screen copy is smaller, so its raster has fewer pixels (the level of detail)
+        # and it is rasterized once per view instead of once per draw.
+        # lines and circles crossing the screen edges are clipped to it, None when nothing is left
+        self.projected = weakref.WeakKeyDictionary()
+
+    margin = 2 # screen pixels kept past the edges, pixels are rounded
+
+    def is_identity(self):
+        return self.zoom == 1 and self.ox == 0 and self.oy == 0
+
+    def affine(self):
+        return Affine(self.zoom, 0, -self.ox * self.zoom, 0, self.zoom, -self.oy * self.zoom)
+
+    def to_screen(self, x, y):
+        return (x - self.ox) * self.zoom, (y - self.oy) * self.zoom
+
+    def to_world(self, x, y):
+        return x / self.zoom + self.ox, y / self.zoom + self.oy
+
+    # a distance on screen measured in world units
+    def to_world_delta(self, dx, dy):
+        return dx / self.zoom, dy / self.zoom
+
+    # (x1, y1, x2, y2) of the world that is on screen
+    def world_rect(self):
+        return (self.ox, self.oy, *self.to_world(self.width, self.height))
+
+    # Changing the view ------------------------------------------------------------------------------------------------------------
+    # move the view by a screen distance
+    def pan(self, dx, dy):
+        wx, wy = self.to_world_delta(dx, dy)
+        self.ox -= wx
+        self.oy -= wy
+        self.projected.clear()
+
+    # multiply the zoom, the world point under the screen point (sx, sy) stays there
+    def zoom_at(self, factor, sx, sy):
+        wx, wy = self.to_world(sx, sy)
+        low, high = self.zoom_range
+        self.zoom = min(max(self.zoom * factor, low), high)
+        self.ox = wx - sx / self.zoom
+        self.oy = wy - sy / self.zoom
+        self.projected.clear()
+
+    def reset(self):
+        self.zoom = 1.0
+        self.ox = self.oy = 0.0
+        self.projected.clear()
+
+    # Projecting --------------------------------------------------------------------------------------------------------------------
+    # line/circle in screen coordinates, only the part on screen (the object itself when the view is
+    # the identity and it is all on screen), None when none of it is
+    def project(self, o):
+        if o in self.projected:
+            return self.projected[o]
+        screen = o
+        if not self.is_identity():
+            screen = o.copy_with([Point(*self.to_screen(p.x, p.y)) for p in o.control_points()])
+        screen = self.projected[o] = self.clip(screen)
+        return screen
+
+    # a line crossing the screen edges is cut with Liang-Barsky and a circle becomes the Arc of the
+    # outline that is on screen, so only on screen pixels are rasterized (filled shapes are clipped
+    # by the layers span by span)
+    def clip(self, o):
+        window = Cutting([], Point(-self.margin, -self.margin), Point(self.width + self.margin, self.height + self.margin))
+        if isinstance(o, Line):
+            if window.contains(o.p1.x, o.p1.y) and window.contains(o.p2.x, o.p2.y):
+                return o
+            x1, y1, x2, y2, accept = liang_batch(np.array([o.p1.x]), np.array([o.p1.y]), np.array([o.p2.x]), np.array([o.p2.y]),
+                                                 window.pmin, window.pmax)
+            if not accept[0]:
+                return None
+            return Line(Point(float(x1[0]), float(y1[0])), Point(float(x2[0]), float(y2[0])), o.color, o.algorithm)
+        if isinstance(o, Circle) and not isinstance(o, FilledCircle):
+            return window.clip_circle(o)
+        return o
+
+    # the points on screen (all of them when the view is the identity)
+    def visible_points(self, points):
+        if self.is_identity():
+            return points
+        x1, y1, x2, y2 = self.world_rect()
+        return [p for p in points if x1 <= p.x <= x2 and y1 <= p.y <= y2]